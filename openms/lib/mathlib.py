@@ -131,9 +131,7 @@ def full_cholesky_decomposition(matrix, threshold):
         raise ValueError('Cholesky decomposition failed! Something wrong in call to dpstrf.')
 
     # Zero upper unreferenced triangle
-    for i in range(dim_):
-        for j in range(i):
-            cholesky_vectors[j, i] = 0
+    cholesky_vectors = numpy.tril(cholesky_vectors)
 
     return cholesky_vectors, pivots, n_vectors
 
@@ -199,7 +197,6 @@ def full_cholesky_orth(S, threshold=1.0e-7):
     del cholesky_vectors
 
     # note: values of pivots is [1, n], not [0, n-1], so we need correct the index
-    for i in range(n_oao):
-        P[pivots[i] - 1, i] = 1.0
+    P[pivots[:n_oao] - 1, numpy.arange(n_oao)] = 1.0
 
     return L, P
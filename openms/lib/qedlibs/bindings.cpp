@@ -12,6 +12,8 @@ PYBIND11_MODULE(_qedhf, m) {
     m.def("cpp_method_impl", &cpp_method_impl);
     m.def("update_fock", &update_fock_energy_gradient_vt_qedhf);
     m.def("gaussian_factor_vt_qedhf", &gaussian_factor_vt_qedhf);
+    m.def("fc_jk_do", &fc_jk_do, "FC-dressed J/K potential in the dipole basis",
+          pybind11::arg("eta"), pybind11::arg("alpha"), pybind11::arg("eri"), pybind11::arg("dm"));
     m.def("test_gaussian", &test_gaussian);
     m.def("eigen3_exampleFunction", &eigen3_exampleFunction);
     // m.def("qmc_exx_chols", &exx_chols, "Calculate exx_chols", pybind11::arg("ltensor"), pybind11::arg("Gf"));
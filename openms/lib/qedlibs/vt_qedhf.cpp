@@ -1,4 +1,5 @@
 #include "vt_qedhf.hpp"
+#include <cmath>
 
 namespace py = pybind11;
 
@@ -36,3 +37,49 @@ std::vector<std::vector<double>> cpp_method_impl(py::object py_obj, const std::v
 }
 
 
+// index of (p, q) in a lower-triangular packed pair list
+static inline ssize_t tril_index(ssize_t p, ssize_t q) {
+    return p >= q ? p * (p + 1) / 2 + q : q * (q + 1) / 2 + p;
+}
+
+
+/*
+  V_{pq} = \sum_{rs} G_{pqrs} [I_{pqrs} - 0.5 I_{psrq}] D_{rs}
+
+  with the vacuum FC factor G_{pqrs} = exp[alpha (eta_p - eta_q + eta_r - eta_s)^2].
+  eri is the 4-fold packed (npair, npair) dipole-basis integral, so neither
+  G nor the unpacked integrals are ever stored.
+*/
+py::array_t<double> fc_jk_do(carray eta, double alpha, carray eri, carray dm) {
+    const ssize_t nao = eta.shape(0);
+    auto e = eta.unchecked<1>();
+    auto I = eri.unchecked<2>();
+    auto D = dm.unchecked<2>();
+
+    py::array_t<double> vhf({nao, nao});
+    auto V = vhf.mutable_unchecked<2>();
+
+    {
+        py::gil_scoped_release release;
+
+        #pragma omp parallel for collapse(2) schedule(static)
+        for (ssize_t p = 0; p < nao; ++p) {
+            for (ssize_t q = 0; q < nao; ++q) {
+                const ssize_t pq = tril_index(p, q);
+                const double d_pq = e(p) - e(q);
+                double v = 0.0;
+                for (ssize_t r = 0; r < nao; ++r) {
+                    const ssize_t rq = tril_index(r, q);
+                    const double d_pqr = d_pq + e(r);
+                    for (ssize_t s = 0; s < nao; ++s) {
+                        const double x = d_pqr - e(s);
+                        v += exp(alpha * x * x) * D(r, s)
+                             * (I(pq, tril_index(r, s)) - 0.5 * I(tril_index(p, s), rq));
+                    }
+                }
+                V(p, q) = v;
+            }
+        }
+    }
+    return vhf;
+}
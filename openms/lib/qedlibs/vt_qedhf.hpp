@@ -29,6 +29,7 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/functional.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 #include <iostream>
 
 namespace py = pybind11;
@@ -37,4 +38,9 @@ namespace py = pybind11;
 std::vector<std::vector<double>> double_gmat(py::object py_obj);
 std::vector<std::vector<double>> cpp_method_impl(py::object py_obj, const std::vector<std::vector<double>>& g);
 
+using carray = py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+// FC-dressed J/K potential in the dipole basis from 4-fold packed eri
+py::array_t<double> fc_jk_do(carray eta, double alpha, carray eri, carray dm);
+
 
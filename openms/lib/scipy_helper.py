@@ -24,7 +24,7 @@ and ``scf.addons.py`` modules.
 
 import numpy
 
-from pyscf.lib import cond, logger
+from pyscf.lib import logger
 import pyscf.scf.addons as pyscf_addons
 
 from openms import __config__
@@ -39,6 +39,16 @@ LINEAR_DEP_TRIGGER = getattr(__config__, "LINEAR_DEP_TRIGGER", 1e-10)
 partial_cholesky_orth = pyscf_addons.partial_cholesky_orth_
 
 
+def cond(a):
+    r"""2-norm condition number of a symmetric matrix, or a stack of them.
+
+    For symmetric matrices the singular values are the absolute eigenvalues,
+    so only the eigenvalues are computed instead of a full SVD.
+    """
+    e = numpy.abs(numpy.linalg.eigvalsh(a))
+    return e.max(axis=-1) / e.min(axis=-1)
+
+
 def remove_linear_dep(mf, threshold=LINEAR_DEP_THRESHOLD,
                        lindep=LINEAR_DEP_TRIGGER,
                        cholesky_threshold=CHOLESKY_THRESHOLD,
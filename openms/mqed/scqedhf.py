@@ -42,8 +42,10 @@ The corresponding HF Energy within SC-QEDHF formalism becomes:
 import time
 import numpy
 from scipy import linalg
+from scipy import special
 
 from pyscf import lib
+from pyscf import ao2mo
 from pyscf.lib import logger
 from pyscf.scf import addons as scf_addons
 from pyscf.scf import chkfile
@@ -56,6 +58,12 @@ from openms.mqed import qedhf
 from openms.mqed import scqedhf
 from openms import __config__
 
+try:
+    # optional C++ kernels, built from openms/lib/qedlibs with ENABLE_QEDLIB
+    import _qedhf
+except ImportError:
+    _qedhf = None
+
 TIGHT_GRAD_CONV_TOL = getattr(__config__, "TIGHT_GRAD_CONV_TOL", True)
 LINEAR_DEP_THRESHOLD = getattr(__config__, "LINEAR_DEP_THRESHOLD", 1e-8)
 CHOLESKY_THRESHOLD = getattr(__config__, "CHOLESKY_THRESHOLD", 1e-10)
@@ -65,24 +73,40 @@ LINEAR_DEP_TRIGGER = getattr(__config__, "LINEAR_DEP_TRIGGER", 1e-10)
 
 def unitary_transform(U, A):
     r"U^T A U"
-    B = numpy.einsum("ik, kj->ij", A, U)
-    B = numpy.einsum("ki, kj->ij", U, B)
-    return B
+    return U.T @ (A @ U)
+
+
+def eigh(h, s, overwrite=False):
+    r"""Solver for generalized eigenvalue problem.
+
+    Uses the divide-and-conquer LAPACK driver. ``h`` and ``s`` are
+    destroyed if ``overwrite=True``.
+    """
+    e, c = linalg.eigh(h, s, driver="gvd", check_finite=False,
+                       overwrite_a=overwrite, overwrite_b=overwrite)
+    return e, fix_eigvec_sign(c)
 
 
-def eigh(h, s):
-    r"""Solver for generalized eigenvalue problem."""
-    e, c = linalg.eigh(h, s)
+def fix_eigvec_sign(c):
+    r"""Make the largest component of each eigenvector positive, in place."""
     idx = numpy.argmax(abs(c.real), axis=0)
-    c[:,c[idx,numpy.arange(len(e))].real<0] *= -1
-    return e, c
+    c *= numpy.where(c[idx, numpy.arange(c.shape[1])].real < 0, -1.0, 1.0)
+    return c
 
 
 def cholesky_diag_fock_rao(mf, h1e):
-    r"""Diagonalize the Fock matrix in RAO basis."""
+    r"""Diagonalize the Fock matrix in RAO basis.
+
+    The generalized problem :math:`F c = e S c` is reduced to a standard one
+    with the inverse Cholesky factor :math:`X = L^{-1}` of the RAO overlap,
+    which is computed once in :meth:`RHF.get_cholesky`:
+    :math:`(X F X^T) \tilde{c} = e \tilde{c}` and :math:`c = X^T \tilde{c}`.
+    """
     F_rao = ao2rao(h1e, mf.P)
-    S_rao = get_reduced_overlp(mf.L)
-    mo_energy, mo_coeff = eigh(F_rao, S_rao)
+    X = mf.rao_orth
+    mo_energy, mo_coeff = linalg.eigh(X @ F_rao @ X.T, driver="evd",
+                                      check_finite=False, overwrite_a=True)
+    mo_coeff = fix_eigvec_sign(X.T @ mo_coeff)
     mo_coeff = get_orbitals_from_rao(mo_coeff, mf.P)
 
     return mo_energy, mo_coeff
@@ -97,20 +121,32 @@ def ao2rao(A_ao, P):
     where P is the projection onto the linarly independent AO basis
     """
 
-    AP = numpy.einsum("ik, kj->ij", A_ao, P)
-    A_rao = numpy.einsum("ik, kj->ij", P.conj().T, AP)
-    del AP
-    return A_rao
+    return P.conj().T @ (A_ao @ P)
 
 
 def get_reduced_overlp(L):
-    return numpy.einsum("ik, kj->ij", L, L.conj().T)
+    return L @ L.conj().T
 
 
 def get_orbitals_from_rao(c, P):
     r"""Sets orbital coefficients from the orbital coefficients in RAO
     """
-    return numpy.einsum("ik, kj->ij", P, c)
+    return P @ c
+
+
+def get_fock_no_diis(mf, h1e, s1e, vhf, dm):
+    r"""Fock matrix ``h1e + vhf`` without DIIS, for the convergence checks.
+
+    Calling get_fock instead of the statement "fock = h1e + vhf" because
+    Fock matrix may be modified in some methods. :func:`qedhf.get_fock`
+    rebuilds ``h1e`` for ``dm``, which only differs from the ``h1e`` built
+    for the energy if the updated boson_coeff changes the FC factors, i.e.,
+    if a mode has more than one boson state. Otherwise the sum is formed
+    directly.
+    """
+    if mf.get_fock.__func__ is qedhf.get_fock and all(n == 1 for n in mf.qed.nboson_states):
+        return h1e + vhf
+    return mf.get_fock(h1e, s1e, vhf, dm)
 
 
 def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
@@ -186,8 +222,8 @@ def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
         logger.info(mf, log_msg)
 
     mol = mf.mol
-    s1e = mf.get_ovlp(mol)
     mf.get_cholesky()
+    s1e = mf._s1e
 
     if dm0 is None:
         dm = mf.get_init_guess(mol, mf.init_guess)
@@ -229,8 +265,10 @@ def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
     scf_conv = False
     mo_energy = mo_coeff = mo_occ = None
 
-    s1e = mf.get_ovlp(mol) # TODO: Check, redundant?
-    cond = lib.cond(s1e)
+    # S is symmetric positive definite, so its 2-norm condition number is the
+    # ratio of its extreme eigenvalues; no SVD needed
+    s_eig = linalg.eigvalsh(s1e, driver="evd", check_finite=False)
+    cond = s_eig[-1] / s_eig[0]
     logger.debug(mf, 'cond(S) = %s', cond)
     if numpy.max(cond)*1e-17 > conv_tol:
         logger.warn(mf, 'Singularity detected in overlap matrix (condition number = %4.3g). '
@@ -269,6 +307,9 @@ def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
 
     cput1 = logger.timer(mf, 'initialize scf', *cput0)
 
+    # dm - dm_last is written here every cycle
+    ddm = numpy.empty_like(dm)
+
     mf.cycles = 0
     for cycle in range(mf.max_cycle):
         time0 = time.time()
@@ -285,11 +326,8 @@ def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
         mf.grad_var_params(mf.dm_do, mf.g_dipole, dm=dm)
         time_etagrad = time.time() - time1
 
-        # use DIIS to update eta (in get_fock)
-        time1 = time.time()
-        h1e = mf.get_hcore(mol, dm, dress=True)
-        time_hcore = time.time() - time1
-
+        # use DIIS to update eta (in get_fock); get_fock rebuilds h1e
+        # after the update, so it is not built here
         time1 = time.time()
         fock = mf.get_fock(h1e, s1e, vhf, dm, cycle, mf_diis)
         time_fock = time.time() - time1
@@ -303,27 +341,27 @@ def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
         vhf = mf.get_veff(mol, dm, dm_last, vhf)
         time_veff = time.time() - time1
 
+        time1 = time.time()
         h1e = mf.get_hcore(mol, dm, dress=True)
+        time_hcore = time.time() - time1
         e_tot = mf.energy_tot(dm, h1e, vhf)
 
         # Update photonic component
         mf.qed.update_cs(dm)
         mf.qed.update_boson_coeff(dm)
 
-        # Here Fock matrix is h1e + vhf, without DIIS.  Calling get_fock
-        # instead of the statement "fock = h1e + vhf" because Fock matrix may
-        # be modified in some methods.
+        # Here Fock matrix is h1e + vhf, without DIIS.
         time1 = time.time()
-        fock = mf.get_fock(h1e, s1e, vhf, dm)  # = h1e + vhf, no DIIS
+        fock = get_fock_no_diis(mf, h1e, s1e, vhf, dm)
         time_fock += time.time() - time1
 
-        norm_gorb = linalg.norm(mf.get_grad(mo_coeff, mo_occ, fock))
+        norm_gorb = linalg.norm(mf.get_grad(mo_coeff, mo_occ, fock), check_finite=False)
         if not TIGHT_GRAD_CONV_TOL:
             norm_gorb = norm_gorb / numpy.sqrt(norm_gorb.size)
         norm_eta = mf.norm_var_params()
         norm_gorb += norm_eta
 
-        norm_ddm = linalg.norm(dm-dm_last)
+        norm_ddm = linalg.norm(numpy.subtract(dm, dm_last, out=ddm).ravel(), check_finite=False)
         logger.info(mf, '\ncycle= %d E= %.15g  delta_E= %4.3g  |g|= %4.3g  |g_var|= %4.3g  |ddm|= %4.3g',
                     cycle+1, e_tot, e_tot-last_hf_e, norm_gorb, norm_eta, norm_ddm)
         logger.debug(mf, "cycle= %d times: h1e_do = %.6g eta_grad = %.6g hcore = %.6g veff = %.6g  fock = %.6g scf = %.6g",
@@ -361,11 +399,11 @@ def kernel(mf, conv_tol=1e-10, conv_tol_grad=None,
         h1e = mf.get_hcore(mol, dm, dress=True)
         e_tot, last_hf_e = mf.energy_tot(dm, h1e, vhf), e_tot
 
-        fock = mf.get_fock(h1e, s1e, vhf, dm)
-        norm_gorb = linalg.norm(mf.get_grad(mo_coeff, mo_occ, fock))
+        fock = get_fock_no_diis(mf, h1e, s1e, vhf, dm)
+        norm_gorb = linalg.norm(mf.get_grad(mo_coeff, mo_occ, fock), check_finite=False)
         if not TIGHT_GRAD_CONV_TOL:
             norm_gorb = norm_gorb / numpy.sqrt(norm_gorb.size)
-        norm_ddm = linalg.norm(dm-dm_last)
+        norm_ddm = linalg.norm(numpy.subtract(dm, dm_last, out=ddm).ravel(), check_finite=False)
 
         conv_tol = conv_tol * 10
         conv_tol_grad = conv_tol_grad * 3
@@ -394,6 +432,7 @@ class RHF(qedhf.RHF):
             openms.runtime_refs.append("vtqedhf")
 
         self.ao2dipole = numpy.zeros_like(self.qed.gmat)
+        self.ao2dipole_inv = numpy.zeros_like(self.qed.gmat)
         self.dm_do = numpy.zeros_like(self.qed.gmat)
 
         self.eta = None
@@ -408,6 +447,8 @@ class RHF(qedhf.RHF):
         # Parameters for dipole moment basis set degeneracy # TODO: Check if being used?
         self.dipole_degen_thresh = 1.0e-8
         self.dipole_fock_shift = 1.0e-3
+        # (dm, shifted MO Fock) shared by the modes in check_n_resolve_degeneracy
+        self._degen_fock = None
 
         self.qed.couplings_var = numpy.ones(self.qed.nmodes)
         self.qed.update_couplings()
@@ -415,7 +456,30 @@ class RHF(qedhf.RHF):
             self.qed.use_cs = False
 
         # Cholesky
-        self.P = self.L = None
+        self.P = self.L = self.rao_orth = None
+        # AO overlap, refreshed by get_cholesky at the start of every kernel
+        self._s1e = None
+
+        # photon density matrices, rebuilt when qed.boson_coeff is updated
+        self._boson_pdm = {}
+        self._boson_pdm_coeff = None
+
+        # one-body FC factors and the (eta, F, boson_coeff) they were built from
+        self._fc_cache = {}
+        # dressed hcore and the FC factors it was built from, see get_hcore
+        self._hcore_cache = None
+        # (U, AO eri, packed eri_DO) of the last construct_eri_DO call
+        self._eri_do_cache = None
+        # (U, bare h1e, gmat, diag(U^T g U), U^T h U) of the last get_h1e_DO call
+        self._h1e_do_cache = None
+
+        # per-iteration (nao, nao) scratch in the dipole basis, reused every cycle;
+        # the nao^4 FC intermediates are built in p-blocks (see get_fc_jk_do)
+        self._h1e_do_buf = numpy.empty((self.nao, self.nao))
+        self._hcore_do_buf = numpy.empty((self.nao, self.nao))
+        self._vhf_do_buf = numpy.empty((self.nao, self.nao))
+        self._vhf_jk_buf = numpy.empty((self.nao, self.nao))
+        self._do2ao_buf = numpy.empty((self.nao, self.nao))
 
         # TODO: replace it with our general DIIS
         self.diis_space = 20
@@ -452,10 +516,15 @@ class RHF(qedhf.RHF):
         scipy_helper.remove_linear_dep(self, threshold=1.0e-7, lindep=1.0e-7,
                                          cholesky_threshold=CHOLESKY_THRESHOLD,
                                          force_pivoted_cholesky=FORCE_PIVOTED_CHOLESKY)
-        s1e = self.get_ovlp(self.mol)
+        self._s1e = s1e = self.get_ovlp(self.mol)
         self.P, self.L = mathlib.full_cholesky_orth(s1e, threshold=1.e-7)
         self.n_oao = self.P.shape[1]
 
+        # inverse Cholesky factor of the RAO overlap, see cholesky_diag_fock_rao
+        S_rao = get_reduced_overlp(self.L)
+        self.rao_orth = linalg.solve_triangular(linalg.cholesky(S_rao, lower=True),
+                                                numpy.eye(S_rao.shape[0]), lower=True)
+
         return self
 
 
@@ -482,67 +551,74 @@ class RHF(qedhf.RHF):
             C^*_{up} A_{uv} C_{vq}, \text{ and } C^T_{pu} = C_{up}
         """
 
-        Amo = numpy.einsum("uv, vq->uq", A, self.mo_coeff)
-        Amo = numpy.einsum("up, uq->pq", self.mo_coeff, Amo)
-
-        return Amo
+        return self.mo_coeff.T @ (A @ self.mo_coeff)
 
 
     def check_n_resolve_degeneracy(self, evals, mo2dipole, dm):
+        r"""Lift degeneracies of the dipole basis ``mo2dipole`` in place.
 
-        degeneracy = 1
-        ediff = 0
-
-        for p in range(self.nao - 1):
-
-            ediff = evals[p + 1] - evals[p]
-
-            if abs(ediff) < self.dipole_degen_thresh:
-                degeneracy += 1
-
-            elif abs(ediff) > self.dipole_degen_thresh and degeneracy > 1:
-                r = p + 1 - degeneracy
-                s = p + 1
+        Each block of near-degenerate eigenvalues (closed by a gap larger
+        than :attr:`dipole_degen_thresh`) is rotated to diagonalize the bare
+        Fock matrix, shifted by the summed dipole matrix, within the block.
+        """
 
-                # non-QED Fock matrix, AO basis
-                fock = self.initialize_bare_fock(dm=dm)
+        # runs of near-degenerate neighbours, as [start, end) in ediff indices
+        small = abs(numpy.diff(evals)) < self.dipole_degen_thresh
+        edges = numpy.diff(numpy.concatenate(([0], small.astype(int), [0])))
+        starts = numpy.flatnonzero(edges == 1)
+        ends = numpy.flatnonzero(edges == -1)
+
+        # a block is only resolved once a larger gap closes it
+        blocks = [(r, s + 1) for r, s in zip(starts, ends) if s < len(small)]
+        if not blocks:
+            return self
+
+        # non-QED Fock matrix plus shift: f_pq += shift * r_pq, in MO basis.
+        # Neither depends on the block or the mode, so they are built once
+        # per dm and shared by all modes in initialize_eta.
+        if self._degen_fock is not None and self._degen_fock[0] is dm:
+            fock = self._degen_fock[1]
+        else:
+            fock = self.ao2mo(self.initialize_bare_fock(dm=dm))
+            sum_dipole_ao = numpy.sum(self.qed.get_dipole_ao(), axis=0)
+            fock += self.dipole_fock_shift * self.ao2mo(sum_dipole_ao)
+            del sum_dipole_ao
+            self._degen_fock = (dm, fock)
 
-                # Transform to MO basis
-                fock = self.ao2mo(fock)
+        for r, s in blocks:
+            # Fock matrix in the degenerate block of the dipole basis
+            vectors = mo2dipole[:, r : s]
+            deg_fock = vectors.T @ fock @ vectors
 
-                # Dipole matrix, AO basis
-                r_ao = self.qed.get_dipole_ao() # self.mol, self.qed.add_nuc_dipole)
-                sum_dipole_ao = numpy.sum(r_ao, axis=0)
-                sum_dipole_mo = self.ao2mo(sum_dipole_ao)
+            # diagonalize deg_fock
+            evecs = linalg.eigh(deg_fock, driver="evd", check_finite=False)[1]
 
-                # plus shift: f_pq += shift * r_pq
-                fock += self.dipole_fock_shift * sum_dipole_mo
+            # the basis of the degenerate space --> the new basis
+            # new = vector * deg_fock
+            mo2dipole[:, r : s] = vectors @ evecs
+            del vectors, deg_fock
 
-                # transform into dipole basis
-                fock = unitary_transform(mo2dipole, fock)
-                deg_fock = fock[r : r + degeneracy, r : r  + degeneracy]
+        return self
 
-                del sum_dipole_ao, sum_dipole_mo, r_ao
-                del fock
 
-                # diagonalize deg_fock
-                evecs = linalg.eigh(deg_fock)[1]
+    def do2ao(self, A, imode=0):
+        r"""Transform ``A`` from the dipole basis of ``imode`` back to AO.
 
-                # the basis of the degenerate space --> the new basis
-                # new = vector * deg_fock
-                vectors = mo2dipole[:, r : s]
-                vectors = numpy.einsum("ik, kj-> ij", vectors, evecs)
-                mo2dipole[:, r : s] = vectors
-                del vectors, deg_fock
+        .. math::
 
-                degeneracy = 1
+            A_{AO} = U^{-T} A_{DO} U^{-1}
 
-        return self
+        with the inverse :math:`U^{-1} = U^T S` stored in ``ao2dipole_inv``.
+        The intermediate product goes to a preallocated buffer.
+        """
+        Uinv = self.ao2dipole_inv[imode]
+        return Uinv.T @ numpy.matmul(A, Uinv, out=self._do2ao_buf)
 
 
     def get_dm_do(self, dm, U):
         r"""Transform ``dm`` density matrix with unitary matrix ``U``."""
-        su = numpy.einsum("ik,kj->ij", self.get_ovlp(self.mol), U)
+        s1e = self._s1e if self._s1e is not None else self.get_ovlp(self.mol)
+        su = s1e @ U
         return unitary_transform(su, dm)
 
 
@@ -561,19 +637,24 @@ class RHF(qedhf.RHF):
             gmo[a] = self.ao2mo(gmo[a])  # transform into MO
 
             # create dipole basis
-            evals, evecs = linalg.eigh(gmo[a])
+            evals, evecs = linalg.eigh(gmo[a], driver="evd", check_finite=False)
 
             # check degeneracy
             self.check_n_resolve_degeneracy(evals, evecs, dm)
             self.eta[a] = evals
 
             # Creating the basis change matrix from ao to dipole basis
-            self.ao2dipole[a] = lib.einsum("ui, ip-> up", self.mo_coeff, evecs)
+            self.ao2dipole[a] = self.mo_coeff @ evecs
 
-        # get eri in Dipole basis
-        for imode in range(self.qed.nmodes):
-            U = self.ao2dipole[imode]
-            self.eri_DO = self.construct_eri_DO(U)
+        self._degen_fock = None
+
+        # U = C V with C^T S C = I and V orthogonal, so U^{-1} = U^T S;
+        # used to transform DO quantities back to AO
+        numpy.matmul(self.ao2dipole.transpose(0, 2, 1), self.get_ovlp(self.mol),
+                     out=self.ao2dipole_inv)
+
+        # get eri in Dipole basis; a single eri_DO (that of the last mode) is kept
+        self.eri_DO = self.construct_eri_DO(self.ao2dipole[-1])
 
         return self
 
@@ -591,30 +672,28 @@ class RHF(qedhf.RHF):
         # if self.second_order_eta_step == True:
         #     self.eta_hessian = numpy.zeros((self.qed.nmodes, self.nao, self.nao))
 
-        for imode in range(self.qed.nmodes):
-            onebody_deta = numpy.zeros(self.nao)
-            twobody_deta = numpy.zeros(self.nao)
+        # sum_{rs} dG_{pqrs} [2 I_{pqrs} - I_{psrq}] D_{rs} of all modes,
+        # sharing the eri_DO blocks
+        nmodes = self.qed.nmodes
+        tpq = self.get_fc_deriv_jk_do(self.gaussian_derivative_vectorized, range(nmodes), dm_do)
+
+        for imode in range(nmodes):
+            dm_diag = numpy.diagonal(dm_do[imode])
 
             tau = numpy.exp(self.qed.squeezed_var[imode]) # TODO: not used yet
             # 1) diagonal part due to [(gtmp - eta)^2 \rho]
-            for p in range(self.nao):
-                onebody_deta[p] -= 2.0 * dm_do[imode, p,p] * g_DO[imode, p] / self.qed.omega[imode]
+            onebody_deta = -2.0 * dm_diag * g_DO[imode] / self.qed.omega[imode]
 
             fc_derivative = self.gaussian_derivative_vectorized(self.eta, imode)
-            tmp1 = 2.0 * self.h1e_DO * dm_do[imode] * fc_derivative
-            tmp2 = (2.0 * dm_do[imode].diagonal().reshape(-1, 1) * dm_do[imode].diagonal() \
-                   - dm_do[imode] * dm_do[imode].T) \
-                   * g_DO[imode].reshape(1, -1) / self.qed.omega[imode]
+            onebody_deta += 2.0 * numpy.einsum("pq,pq,pq->p", self.h1e_DO, dm_do[imode], fc_derivative)
+            # sum_q [2 D_pp D_qq - D_pq D_qp] g_q, without forming the outer product
+            tmp2 = (dm_do[imode] * dm_do[imode].T) @ g_DO[imode]
+            tmp2 -= 2.0 * dm_diag * (dm_diag @ g_DO[imode])
+            onebody_deta += tmp2 / self.qed.omega[imode]
+            del fc_derivative, tmp2
 
-            onebody_deta += numpy.sum(tmp1 - tmp2, axis=1)
-            del fc_derivative, tmp1, tmp2
-
-            fc_derivative = self.gaussian_derivative_vectorized(self.eta, imode, onebody=False)
-            fc_derivative *= (2.0 * self.eri_DO - self.eri_DO.transpose(0, 3, 2, 1))
-
-            tmp = lib.einsum('pqrs, rs-> pq', fc_derivative, dm_do[imode], optimize=True)
-            twobody_deta = lib.einsum('pq, pq-> p', tmp, dm_do[imode], optimize=True)
-            del fc_derivative, tmp
+            # sum_{qrs} dG_{pqrs} [2 I_{pqrs} - I_{psrq}] D_{rs} D_{pq}
+            twobody_deta = numpy.einsum("pq,pq->p", tpq[imode], dm_do[imode])
 
             self.eta_grad[imode] = onebody_deta + twobody_deta
 
@@ -693,36 +772,108 @@ class RHF(qedhf.RHF):
 
 
     def construct_eri_DO(self, U):
-        r"""Repulsion integral modifier according to dipole self-energy terms"""
+        r"""Repulsion integral modifier according to dipole self-energy terms
+
+        The AO integrals are kept with their full 8-fold symmetry (``s8``) and
+        transformed by :func:`pyscf.ao2mo.incore.full`. The integrals in the
+        dipole basis keep the 4-fold permutation symmetry, so they are
+        returned packed, with shape
+        ``(nao*(nao+1)//2, nao*(nao+1)//2)``. Use :meth:`get_eri_DO` to
+        unpack them.
+
+        The last transformation is reused as long as ``U`` and the AO
+        integrals are unchanged.
+        """
         if self._eri is None:
-            self._eri = self.mol.intor("int2e", aosym="s1")
+            self._eri = self.mol.intor("int2e", aosym="s8")
             logger.debug(self, f"First build of two-body integral! eri.shape= {self._eri.shape}")
 
-        from pyscf.ao2mo.addons import restore
-        self._eri = restore(1, self._eri, self.nao)
+        cached = self._eri_do_cache
+        if cached is not None and cached[1] is self._eri and numpy.array_equal(cached[0], U):
+            return cached[2]
+
+        # full (nao^4) integrals set by the user are packed once and kept packed
+        if self._eri.size == self.nao**4:
+            self._eri = ao2mo.restore(8, self._eri, self.nao)
+
+        eri_do = ao2mo.incore.full(self._eri, U, compact=True)
+        self._eri_do_cache = (U.copy(), self._eri, eri_do)
+        return eri_do
 
-        eri = self._eri.copy()
-        if eri.size == self.nao**4:
-            eri = eri.reshape((self.nao,)*4)
 
-        eri = numpy.einsum("pu, qv, rw, st, pqrs->uvwt", U, U, U, U, eri, optimize=True)
+    def get_eri_DO(self, p_slice=slice(None)):
+        r"""Unpack the dipole-basis integrals :math:`I_{pqrs}` for ``p`` in ``p_slice``.
 
-        return eri
+        Returns an array of shape ``(np, nao, nao, nao)``.
+        """
+        nao = self.nao
+        if p_slice == slice(None):
+            return ao2mo.restore(1, self.eri_DO, nao)
+
+        pq = lib.square_mat_in_trilu_indices(nao)[p_slice]
+        eri = lib.unpack_tril(self.eri_DO[pq.ravel()])
+        return eri.reshape(-1, nao, nao, nao)
+
+
+    def get_boson_pdm(self, imode):
+        r"""Return the photon density matrix of mode ``imode``.
+
+        The matrices only change when :meth:`update_boson_coeff` replaces
+        ``qed.boson_coeff``, so they are cached and reused by the FC factors
+        and their derivatives within an SCF cycle.
+        """
+        if self._boson_pdm_coeff is not self.qed.boson_coeff:
+            self._boson_pdm = {}
+            self._boson_pdm_coeff = self.qed.boson_coeff
+
+        if imode not in self._boson_pdm:
+            mdim = self.qed.nboson_states[imode]
+            idx = sum(self.qed.nboson_states[:imode])
+            ci = self.qed.boson_coeff[idx : idx + mdim, idx]
+            self._boson_pdm[imode] = numpy.outer(numpy.conj(ci), ci)
+
+        return self._boson_pdm[imode]
 
 
     def photon_exp_val(self, imode):
+        r"""Return :math:`2\langle b^\dagger b\rangle` of mode ``imode``.
+
+        .. math::
 
+            2\langle b^\dagger b\rangle = 2\sum_n n |c_n|^2
+
+        Only the diagonal of the photon density matrix, :math:`|c_n|^2`,
+        contributes, so this is an O(m) dot product.
+
+        .. note::
+
+           Earlier versions broadcast ``2 * arange(m)`` over the whole
+           density matrix :math:`c^*_m c_n`, which gives
+           :math:`2(\sum_m c^*_m)(\sum_n n c_n)` and is not the photon number
+           whenever off-diagonal coherences are present.
+        """
         mdim = self.qed.nboson_states[imode]
         idx = sum(self.qed.nboson_states[:imode])
-
         ci = self.qed.boson_coeff[idx : idx + mdim, idx]
-        pdm = numpy.outer(numpy.conj(ci), ci)
 
-        ph_exp_val = 2.0 * numpy.arange(mdim)
-        return numpy.sum(ph_exp_val * pdm)
+        return 2.0 * numpy.dot(numpy.arange(mdim), numpy.square(numpy.abs(ci)))
+
+
+    def get_diff_eta(self, eta, imode, onebody=True, p_slice=slice(None)):
+        r"""Return :math:`\eta_p - \eta_q` or, for the two-body case,
+        :math:`(\eta_p - \eta_q) + (\eta_r - \eta_s)` of mode ``imode``.
+
+        The two-body differences are a sum of two one-body differences, so
+        they are formed with a single broadcast add of two (nao, nao) arrays.
+        """
+        d_pq = eta[imode, p_slice, None] - eta[imode, None, :]
+        if onebody:
+            return d_pq
+        d_rs = eta[imode, :, None] - eta[imode, None, :]
+        return d_pq[:, :, None, None] + d_rs
 
 
-    def FC_factor(self, eta, imode, onebody=True):
+    def FC_factor(self, eta, imode, onebody=True, p_slice=slice(None)):
         r"""Compute Franck-Condon (or renormalization) factor
 
         .. math::
@@ -731,17 +882,26 @@ class RHF(qedhf.RHF):
                               {4\omega_\alpha}]
 
         Here :math:`\tau= exp(F_\alpha)` and :math:`F_\alpha` are the VSQ prameters.
+
+        ``p_slice`` restricts the first index to a block of rows, which is
+        used to build the two-body factors block by block.
+
+        The one-body factors are cached until :math:`\eta`, :math:`F` or the
+        photon coefficients of ``imode`` change, so the returned array must
+        not be modified in place.
         """
 
         # Number of boson states
         mdim = self.qed.nboson_states[imode]
 
-        if onebody:
-            p, q = numpy.ogrid[:self.nao, :self.nao]
-            diff_eta = eta[imode, p] - eta[imode, q]
-        else:
-            p, q, r, s = numpy.ogrid[:self.nao, :self.nao, :self.nao, :self.nao]
-            diff_eta = eta[imode, p] - eta[imode, q] +  eta[imode, r] - eta[imode, s]
+        if onebody and p_slice == slice(None):
+            cached = self._fc_cache.get(imode)
+            if (cached is not None and cached[1] == self.qed.squeezed_var[imode]
+                    and (mdim == 1 or cached[2] is self.qed.boson_coeff)
+                    and numpy.array_equal(cached[0], eta[imode])):
+                return cached[3]
+
+        diff_eta = self.get_diff_eta(eta, imode, onebody, p_slice)
 
         tau = numpy.exp(self.qed.squeezed_var[imode])
         tmp = tau / self.qed.omega[imode]
@@ -751,54 +911,46 @@ class RHF(qedhf.RHF):
         #       this part does not work for squeezing case at this stage
         # use the get_boson_dm function
         if mdim > 1:
-            idx = sum(self.qed.nboson_states[:imode])
-            ci = self.qed.boson_coeff[idx : idx + mdim, idx]
-            pdm = numpy.outer(numpy.conj(ci), ci)
-
+            pdm = self.get_boson_pdm(imode)
             factor = self.qed.displacement_exp_val(imode, tmp * diff_eta, pdm)
 
-        # Vacuum Gaussian factor
+        # Vacuum Gaussian factor, exp[-0.5 * (tmp * diff_eta)^2], in place
         else:
-            factor = numpy.exp((-0.5 * (tmp * diff_eta) ** 2))
+            factor = numpy.square(diff_eta, out=diff_eta)
+            factor *= -0.5 * tmp**2
+            numpy.exp(factor, out=factor)
 
-        if onebody:
-            return factor.reshape(self.nao, self.nao)
-        else:
-            return factor.reshape(self.nao, self.nao, self.nao, self.nao)
+        if onebody and p_slice == slice(None):
+            self._fc_cache[imode] = (eta[imode].copy(), self.qed.squeezed_var[imode],
+                                     self.qed.boson_coeff, factor)
+        return factor
 
 
-    def gaussian_derivative_vectorized(self, eta, imode, onebody=True):
+    def gaussian_derivative_vectorized(self, eta, imode, onebody=True, p_slice=slice(None)):
 
         # Number of boson states
         mdim = self.qed.nboson_states[imode]
 
-        if onebody:
-            p, q = numpy.ogrid[:self.nao, :self.nao]
-            diff_eta = eta[imode, p] - eta[imode, q]
-        else:
-            p, q, r, s = numpy.ogrid[:self.nao, :self.nao, :self.nao, :self.nao]
-            diff_eta = eta[imode, p] - eta[imode, q] + eta[imode, r] - eta[imode, s]
+        diff_eta = self.get_diff_eta(eta, imode, onebody, p_slice)
 
         tau = numpy.exp(self.qed.squeezed_var[imode])
         tmp = tau / self.qed.omega[imode]
 
         # Displacement operator derivative
         if mdim > 1:
-            idx = sum(self.qed.nboson_states[:imode])
-            ci = self.qed.boson_coeff[idx : idx + mdim, idx]
-            pdm = numpy.outer(numpy.conj(ci), ci)
-
+            pdm = self.get_boson_pdm(imode)
             derivative = self.qed.displacement_deriv(imode, tmp * diff_eta, pdm)
 
-        # Apply vacuum derivative formula
+        # Apply vacuum derivative formula,
+        # -exp[-0.5 * (tmp * diff_eta)^2] * tmp^2 * diff_eta
         else:
-            derivative = -numpy.exp((-0.5 * (tmp * diff_eta) ** 2)) \
-                         * ((tmp ** 2) * diff_eta)
+            derivative = numpy.square(diff_eta)
+            derivative *= -0.5 * tmp**2
+            numpy.exp(derivative, out=derivative)
+            derivative *= diff_eta
+            derivative *= -tmp**2
 
-        if onebody:
-            return derivative.reshape(self.nao, self.nao)
-        else:
-            return derivative.reshape(self.nao, self.nao, self.nao, self.nao)
+        return derivative
 
 
     def get_h1e_DO(self, mol=None, dm=None):
@@ -829,25 +981,40 @@ class RHF(qedhf.RHF):
         if self.g_dipole is None:
             self.g_dipole = numpy.zeros((self.qed.nmodes, self.nao))
 
-        for a in range(self.qed.nmodes):
-
-            gtmp = self.qed.gmat[a] * numpy.sqrt(self.qed.omega[a] / 2.0)
-            gtmp *= self.qed.couplings_var[a]
-            gtmp = unitary_transform(self.ao2dipole[a], gtmp)
-
-            # h1e in dipole basis
-            self.h1e_DO = unitary_transform(self.ao2dipole[a], self.bare_h1e)
-
-            tau = numpy.exp(self.qed.squeezed_var[a]) # TODO: not used yet
-            # one-body operator h1e_pq = h1e_pq + g_pq(p, l) * g_pq(l, p)
-            for p in range(self.nao):
-                # For the diagonal part, the FC factor is 1.0, i.e., independent  of tau and f
-                self.g_dipole[a, p] = gtmp[p, p] - self.eta[a, p]
-                self.h1e_DO[p, p] += self.g_dipole[a, p] ** 2 / self.qed.omega[a]
-            del gtmp
-
-            # transform DM from AO to DO
-            self.dm_do[a] = self.get_dm_do(dm, self.ao2dipole[a])
+        # h1e_DO is rebuilt below, so the dressed hcore has to be rebuilt too
+        self._hcore_cache = None
+
+        # the transforms of gmat and bare_h1e only change with U, i.e., in
+        # initialize_eta, so they are reused while U, bare_h1e and gmat are the same
+        U = self.ao2dipole
+        a = self.qed.nmodes - 1
+        cached = self._h1e_do_cache
+        if (cached is None or cached[1] is not self.bare_h1e or cached[2] is not self.qed.gmat
+                or not numpy.array_equal(cached[0], U)):
+            # all modes at once, with matmul broadcasting over the leading mode axis;
+            # only the diagonal of U^T g U is needed
+            g_diag = numpy.einsum("aup,aup->ap", U, self.qed.gmat @ U)
+            cached = (U.copy(), self.bare_h1e, self.qed.gmat, g_diag,
+                      U[a].T @ (self.bare_h1e @ U[a]))
+            self._h1e_do_cache = cached
+
+        scale = numpy.sqrt(self.qed.omega / 2.0) * self.qed.couplings_var
+        numpy.multiply(cached[3], scale[:, None], out=self.g_dipole)
+        self.g_dipole -= self.eta
+
+        # transform DM from AO to DO, D_DO = U^T S D S U = U^{-1} D U^{-T}
+        Uinv = self.ao2dipole_inv
+        numpy.matmul(Uinv, dm @ Uinv.transpose(0, 2, 1), out=self.dm_do)
+
+        # h1e in dipole basis; like eri_DO, a single h1e_DO (that of the last
+        # mode) is kept, so the other modes are not transformed at all
+        self.h1e_DO = self._h1e_do_buf
+        numpy.copyto(self.h1e_DO, cached[4])
+
+        tau = numpy.exp(self.qed.squeezed_var[a]) # TODO: not used yet
+        # one-body operator h1e_pq = h1e_pq + g_pq(p, l) * g_pq(l, p)
+        # For the diagonal part, the FC factor is 1.0, i.e., independent  of tau and f
+        self.h1e_DO.ravel()[::self.nao + 1] += numpy.square(self.g_dipole[a]) / self.qed.omega[a]
 
         return self
 
@@ -868,6 +1035,10 @@ class RHF(qedhf.RHF):
 
         .. note::
             considering moving the DSE correction to this function
+
+        The dressed matrix only depends on ``h1e_DO`` and the FC factors, so
+        it is reused until either changes (it does not depend on ``dm``) and
+        must not be modified in place.
         """
 
         if mol is None: mol = self.mol
@@ -877,21 +1048,20 @@ class RHF(qedhf.RHF):
         if not dress:
             return self.bare_h1e
         else:
+            # update the renormalization/FC factors
+            factors = [self.FC_factor(self.eta, imode) for imode in range(self.qed.nmodes)]
+            if self._hcore_cache is not None and all(
+                    f is f0 for f, f0 in zip(factors, self._hcore_cache[0])):
+                return self._hcore_cache[1]
+
             # only works for one mode at this moment
-            h1e_DO = self.h1e_DO.copy()
-            for imode in range(self.qed.nmodes):
-                # update the renormalization/FC factors
-                # and dress h1e : h_pq  * G_{pq}
-                factor = self.FC_factor(self.eta, imode)
-                if imode == 0:
-                    h1e = numpy.einsum("pq, pq->pq", h1e_DO, factor)
-                else:
-                    h1e = numpy.einsum("pq, pq->pq", h1e, factor)
-            del h1e_DO
-
-            U = self.ao2dipole[0]
-            Uinv = linalg.inv(U)
-            h1e = unitary_transform(Uinv, h1e)
+            # dress h1e : h_pq  * G_{pq}
+            h1e = numpy.multiply(self.h1e_DO, factors[0], out=self._hcore_do_buf)
+            for factor in factors[1:]:
+                h1e *= factor
+
+            h1e = self.do2ao(h1e, imode=0)
+            self._hcore_cache = (factors, h1e)
 
         return h1e
 
@@ -914,43 +1084,133 @@ class RHF(qedhf.RHF):
 
         # work for single mode only at this moment
         imode = 0
-        U = self.ao2dipole[imode]
-        dm_do = self.get_dm_do(dm, U)
+        # D_DO = U^T S D S U, with S U = U^{-T} already stored
+        Uinv = self.ao2dipole_inv[imode]
+        dm_do = Uinv @ (dm @ Uinv.T)
 
         ## vectorized code
         # Tr[g_pq * D] in DO
-        g_dot_D = numpy.diagonal(dm_do) @ self.g_dipole[imode, :]
+        g_dipole = self.g_dipole[imode]
+        dm_diag = numpy.diagonal(dm_do)
+        g_dot_D = dm_diag @ g_dipole
 
-        p_indices = numpy.arange(self.nao)
-        vhf_do = numpy.zeros((self.nao, self.nao))
-        vhf_do[p_indices, p_indices] += (2.0 * self.g_dipole[imode, p_indices] * g_dot_D -
-                                         numpy.square(self.g_dipole[imode, p_indices]) \
-                                         * dm_do[p_indices, p_indices]) / self.qed.omega[0]
+        # off-diagonal elements, -g_p g_q D_qp / omega, as a dense outer product
+        vhf_do = numpy.outer(g_dipole, g_dipole, out=self._vhf_do_buf)
+        vhf_do *= dm_do.T
+        vhf_do *= -1.0 / self.qed.omega[0]
+        numpy.fill_diagonal(vhf_do, (2.0 * g_dipole * g_dot_D - numpy.square(g_dipole) * dm_diag) \
+                                    / self.qed.omega[0])
 
-        vhf_do_offdiag = numpy.zeros_like(vhf_do)
+        # FC-dressed J/K, G_{pqrs} [I_{pqrs} - 0.5 I_{psrq}] D_{rs}, symmetrized in pq
+        vhf = self.get_fc_jk_do(imode, dm_do, out=self._vhf_jk_buf)
+        vhf_do += 0.5 * (vhf + vhf.T)
 
-        # Calculate off-diagonal elements
-        p, q = numpy.triu_indices(self.nao, k=1)
-        vhf_do_offdiag[p, q] -= self.g_dipole[imode, p] * self.g_dipole[imode, q] * dm_do[q, p] / self.qed.omega[0]
-        vhf_do_offdiag[q, p] = vhf_do_offdiag[p, q]  # Exploit symmetry
-        vhf_do += vhf_do_offdiag
+        # transform back to AO
+        vhf = self.do2ao(vhf_do, imode)
 
-        # vectorized code
-        fc_factor = self.FC_factor(self.eta, imode, onebody=False)
-        fc_factor *= (1.0 * self.eri_DO - 0.5 * self.eri_DO.transpose(0, 3, 2, 1))
-        vhf = 0.5 * lib.einsum('pqrs, rs->pq', fc_factor, dm_do, optimize=True)
-        vhf += 0.5 * lib.einsum('qprs, rs->pq', fc_factor, dm_do, optimize=True)
-        vhf_do += vhf
+        return vhf
 
-        # transform back to AO
-        Uinv = linalg.inv(U)
-        vhf = unitary_transform(Uinv, vhf_do)
 
+    def get_fc_jk_do(self, imode, dm_do, out=None):
+        r"""FC-dressed two-body potential in the dipole basis
+
+        .. math::
+
+            V_{pq} = \sum_{rs} G_{pqrs} [I_{pqrs} - \frac{1}{2} I_{psrq}] D_{rs}
+
+        The FC factors, the dressed integrals and the contraction are done
+        for a block of ``p`` at a time, so no nao^4 temporaries are formed.
+        The result is written to ``out`` if it is given.
+
+        For the vacuum FC factor, the fused OpenMP kernel ``_qedhf.fc_jk_do``
+        is used when the compiled qedlibs module is available. It works on
+        the packed ``eri_DO`` directly.
+        """
+
+        nao = self.nao
+        if _qedhf is not None and self.qed.nboson_states[imode] == 1:
+            tmp = numpy.exp(self.qed.squeezed_var[imode]) / self.qed.omega[imode]
+            vhf = _qedhf.fc_jk_do(self.eta[imode], -0.5 * tmp**2, self.eri_DO, dm_do)
+            if out is None:
+                return vhf
+            out[:] = vhf
+            return out
+
+        dm_flat = dm_do.ravel()
+        vhf = numpy.empty((nao, nao)) if out is None else out
+        for p0, p1 in lib.prange(0, nao, self._get_fc_blksize(imode)):
+            fc_factor = self.FC_factor(self.eta, imode, onebody=False, p_slice=slice(p0, p1))
+            fc_factor *= self._get_asym_eri_DO(slice(p0, p1), 1.0, -0.5)
+            vhf[p0:p1] = (fc_factor.reshape(-1, nao * nao) @ dm_flat).reshape(p1 - p0, nao)
+            del fc_factor
         return vhf
 
 
+    def get_fc_deriv_jk_do(self, fc_deriv, imode, dm_do):
+        r"""Two-body term of the variational gradients in the dipole basis
+
+        .. math::
+
+            T_{pq} = \sum_{rs} \frac{\partial G_{pqrs}}{\partial x}
+                     [2 I_{pqrs} - I_{psrq}] D_{rs}
+
+        where ``fc_deriv(eta, imode, onebody=False, p_slice=...)`` returns the
+        derivative of the two-body FC factors for a block of ``p``. As in
+        :meth:`get_fc_jk_do`, no nao^4 temporaries are formed.
+
+        ``imode`` may also be a sequence of modes, with ``dm_do`` stacked
+        accordingly. The antisymmetrized eri block is then built once per
+        block of ``p`` and shared by all modes.
+
+        Note that the FC factors depend on
+        :math:`(\eta_p - \eta_q) + (\eta_r - \eta_s)` through a Gaussian, which
+        does not factorize into ``pq`` and ``rs`` parts. A Cholesky
+        factorization of the eri therefore does not lower the cost of this
+        contraction; its memory is bounded by the ``p`` blocks instead.
+        """
+
+        nao = self.nao
+        modes = numpy.atleast_1d(imode)
+        dm_flat = numpy.reshape(dm_do, (len(modes), nao * nao))
+        tpq = numpy.empty((len(modes), nao, nao))
+        blksize = min(self._get_fc_blksize(a) for a in modes)
+        for p0, p1 in lib.prange(0, nao, blksize):
+            asym = self._get_asym_eri_DO(slice(p0, p1), 2.0, -1.0)
+            for i, a in enumerate(modes):
+                deriv = fc_deriv(self.eta, a, onebody=False, p_slice=slice(p0, p1))
+                deriv *= asym
+                tpq[i, p0:p1] = (deriv.reshape(-1, nao * nao) @ dm_flat[i]).reshape(p1 - p0, nao)
+                del deriv
+            del asym
+        return tpq if numpy.ndim(imode) else tpq[0]
+
+
+    def _get_asym_eri_DO(self, p_slice, a, b):
+        r"""Return :math:`a I_{pqrs} + b I_{psrq}` for ``p`` in ``p_slice``.
+
+        Only one array besides the unpacked block is allocated.
+        """
+        eri = self.get_eri_DO(p_slice)
+        asym = numpy.multiply(eri.transpose(0, 3, 2, 1), b)
+        if a != 1.0:
+            eri *= a
+        asym += eri
+        return asym
+
+
+    def _get_fc_blksize(self, imode):
+        r"""Number of ``p`` rows per block of the two-body FC intermediates."""
+        nao = self.nao
+        # FC block, eri block and its antisymmetrized copy, plus the
+        # (mdim, mdim) photon matrix elements per entry if mdim > 1
+        mdim = self.qed.nboson_states[imode]
+        nbuf = 3 if mdim == 1 else 3 + mdim**2
+        mem_avail = max(self.max_memory - lib.current_memory()[0], 1)
+        return max(1, min(nao, int(mem_avail * 1e6 / 8 / (nbuf * nao**3))))
+
+
     def norm_var_params(self):
-        return linalg.norm(self.eta_grad) / numpy.sqrt(self.eta.size)
+        return linalg.norm(self.eta_grad.ravel(), check_finite=False) / numpy.sqrt(self.eta.size)
 
 
     def init_var_params(self, dm=None):
@@ -1007,8 +1267,6 @@ class RHF(qedhf.RHF):
         It is obvious that the VT-QEDHF WF is no longer the single product state.
         """
 
-        from math import factorial
-
         mocc = mo_coeff[:,mo_occ>0]
         rho = (mocc*mo_occ[mo_occ>0]).dot(mocc.conj().T)
 
@@ -1017,24 +1275,26 @@ class RHF(qedhf.RHF):
 
         # transform rho into dipole basis
         U = self.ao2dipole[imode]
-        Uinv = linalg.inv(U)
         rho_DO = unitary_transform(U, rho)
 
-        rho_tot = numpy.zeros((nfock, nao, nfock, nao))
-        for m in range(nfock):
-            for n in range(nfock):
-                # <m | D(z_alpha) |0>
-                zalpha = self.qed.couplings_var[imode] * self.eta[imode]
-                zalpha /= self.qed.omega[imode]
-
-                z0 = numpy.exp(-0.5 * zalpha ** 2)
-                zm = z0 * zalpha ** m * numpy.sqrt(factorial(m))
-                zn = z0 * (-zalpha) ** n * numpy.sqrt(factorial(n))
-
-                # back to AO
-                rho_tmp = rho_DO * numpy.outer(zm, zn)
-                rho_tmp = unitary_transform(Uinv, rho_tmp)
-                rho_tot[m, :, n, :] = rho_tmp
+        # <m | D(z_alpha) |0> for all m at once, shape (nfock, nao)
+        zalpha = self.qed.couplings_var[imode] * self.eta[imode]
+        zalpha /= self.qed.omega[imode]
+
+        z0 = numpy.exp(-0.5 * zalpha ** 2)
+        m = numpy.arange(nfock)[:, None]
+        sqrt_fact = numpy.exp(0.5 * special.gammaln(m + 1))
+        zm = z0 * zalpha ** m * sqrt_fact
+        zn = z0 * (-zalpha) ** m * sqrt_fact
+
+        # rho_DO * outer(zm[m], zn[n]) for every (m, n), back to AO with a
+        # single broadcast matmul written straight into the (m, p, n, q) layout
+        rho_tmp = numpy.multiply(zm[:, None, :, None] * rho_DO, zn[None, :, None, :])
+        Uinv = self.ao2dipole_inv[imode]
+        rho_tmp = numpy.matmul(Uinv.T, rho_tmp)
+        rho_tot = numpy.empty((nfock, nao, nfock, nao), dtype=rho_tmp.dtype)
+        numpy.matmul(rho_tmp, Uinv, out=rho_tot.transpose(0, 2, 1, 3))
+        del rho_tmp
 
         rho_e = numpy.einsum("mpmq->pq", rho_tot)
         rho_b = numpy.einsum("mpnp->mn", rho_tot) / numpy.trace(rho)
@@ -1103,7 +1363,8 @@ class RHF(qedhf.RHF):
 
         # replace the following with chols, without using eri_DO
         fc_factor = self.FC_factor(self.eta, imode, onebody=False)
-        fc_factor *= (1.0 * self.eri_DO - 0.5 * self.eri_DO.transpose(0, 3, 2, 1))
+        eri = self.get_eri_DO()
+        fc_factor *= (1.0 * eri - 0.5 * eri.transpose(0, 3, 2, 1))
         # G_{pqrs} * [I_{pqrs} - 0.5 * I_{ps rq} ] * rho_{rs}
         # = L_{\gamma, pq} L_{\gamma, rs} * \rho_{rs}
         # - L_{\gamma, pq} L_{\gamma, rs} * \rho_{rq}
@@ -1121,7 +1382,7 @@ class RHF(qedhf.RHF):
         for imode in range(self.qed.nmodes):
             #U = self.ao2dipole[imode]
             factor = self.FC_factor(self.eta, imode, onebody=False)
-            eri_tmp = self.eri_DO * factor
+            eri_tmp = eri * factor
             vj, vk = hf.dot_eri_dm(eri_tmp, dm, hermi, with_j, with_k)
             del eri_tmp
 
@@ -58,6 +58,7 @@ Then we derive the QEDHF functional and Fock matrix accordingly based on the HF
 
 import numpy
 from scipy import linalg
+from scipy import special
 import warnings
 
 from pyscf import lib
@@ -87,7 +88,7 @@ def entropy(rho):
 
         S = - K_B Tr[\rho \text{ln}(\rho)]
     """
-    e, _ = linalg.eigh(rho)
+    e = linalg.eigvalsh(rho, driver="evd", check_finite=False)
     e = e[e > 0]
     tmp = e * numpy.log(e)
     return -1.0 * numpy.sum(tmp)
@@ -159,7 +160,7 @@ class RHF(scqedhf.RHF):
 
         return vhf
 
-    def gaussian_derivative_sq_vector(self, eta, imode, onebody=True):
+    def gaussian_derivative_sq_vector(self, eta, imode, onebody=True, p_slice=slice(None)):
         r"""
         Compute derivative of FC factor with respect to F (squeezing)
 
@@ -167,27 +168,24 @@ class RHF(scqedhf.RHF):
 
             \frac{d G}{\partial f_\alpha} =
         """
-        nao = self.qed.gmat[imode].shape[0]
-        if onebody:
-            p, q = numpy.ogrid[:nao, :nao]
-            diff_eta = eta[imode, q] - eta[imode, p]
-        else:
-            p, q, r, s = numpy.ogrid[:nao, :nao, :nao, :nao]
-            diff_eta = eta[imode, q] - eta[imode, p] + eta[imode, s] - eta[imode, r]
+        # even in diff_eta, so the sign convention of get_diff_eta does not matter
+        diff_eta = self.get_diff_eta(eta, imode, onebody, p_slice)
 
         tau = numpy.exp(self.qed.squeezed_var[imode])
         tmp = tau / self.qed.omega[imode]
 
-        derivative = -numpy.exp((-0.5 * (tmp * diff_eta) ** 2)) \
-                     * ((tmp * diff_eta) ** 2)
+        # -exp[-0.5 * (tmp * diff_eta)^2] * (tmp * diff_eta)^2, in place,
+        # with the sign folded into x2 = -(tmp * diff_eta)^2
+        x2 = numpy.square(diff_eta, out=diff_eta)
+        x2 *= -tmp**2
+        derivative = numpy.multiply(x2, 0.5)
+        numpy.exp(derivative, out=derivative)
+        derivative *= x2
 
-        if onebody:
-            return derivative.reshape(nao, nao)
-        else:
-            return derivative.reshape(nao, nao, nao, nao)
+        return derivative
 
 
-    def gaussian_derivative_f_vector(self, eta, imode, onebody=True):
+    def gaussian_derivative_f_vector(self, eta, imode, onebody=True, p_slice=slice(None)):
         r"""
         Compute derivative of FC factor with respect to f
 
@@ -199,28 +197,25 @@ class RHF(scqedhf.RHF):
         # Number of boson states
         mdim = self.qed.nboson_states[imode]
 
-        if onebody:
-            p, q = numpy.ogrid[:self.nao, :self.nao]
-            diff_eta = eta[imode, p] - eta[imode, q]
-        else:
-            p, q, r, s = numpy.ogrid[:self.nao, :self.nao, :self.nao, :self.nao]
-            diff_eta = eta[imode, p] - eta[imode, q] + eta[imode, r] - eta[imode, s]
+        diff_eta = self.get_diff_eta(eta, imode, onebody, p_slice)
 
         tau = numpy.exp(self.qed.squeezed_var[imode])
         tmp = tau / self.qed.omega[imode]
 
         # Displacement operator derivative
         if mdim > 1:
-            idx = sum(self.qed.nboson_states[:imode])
-            ci = self.qed.boson_coeff[idx : idx + mdim, idx]
-            pdm = numpy.outer(numpy.conj(ci), ci)
-
+            pdm = self.get_boson_pdm(imode)
             derivative = self.qed.displacement_deriv_vt(imode, tmp * diff_eta, pdm)
 
-        # Apply vacuum derivative formula
+        # Apply vacuum derivative formula,
+        # -exp[-0.5 * (tmp * diff_eta)^2] * (tmp * diff_eta)^2, in place,
+        # with the sign folded into x2 = -(tmp * diff_eta)^2
         else:
-            derivative = -numpy.exp((-0.5 * (tmp * diff_eta) ** 2)) \
-                          * ((tmp * diff_eta) ** 2)
+            x2 = numpy.square(diff_eta, out=diff_eta)
+            x2 *= -tmp**2
+            derivative = numpy.multiply(x2, 0.5)
+            numpy.exp(derivative, out=derivative)
+            derivative *= x2
 
         # in principle, the couplings_var should be > 0.0
         if self.qed.couplings_var[imode] < -0.05 or self.qed.couplings_var[imode] > 1.05:
@@ -228,10 +223,7 @@ class RHF(scqedhf.RHF):
 
         derivative /= self.qed.couplings_var[imode]
 
-        if onebody:
-            return derivative.reshape(self.nao, self.nao)
-        else:
-            return derivative.reshape(self.nao, self.nao, self.nao, self.nao)
+        return derivative
 
 
     def get_vsq_gradient(self, dm_do, g_DO, dm=None):
@@ -251,6 +243,9 @@ class RHF(scqedhf.RHF):
             if abs(self.qed.squeezed_var[0]) > 1.0e-5:
                 g2_dot_D = 2.0 * numpy.einsum("pp, p->", dm_do[imode], g_DO[imode]**2)
 
+        # two-electron part of all modes, sharing the eri_DO blocks
+        tpq = self.get_fc_deriv_jk_do(self.gaussian_derivative_sq_vector, range(nmodes), dm_do)
+
         # will be replaced with c++ code
         for imode in range(nmodes):
             tau = numpy.exp(self.qed.squeezed_var[imode])
@@ -260,19 +255,15 @@ class RHF(scqedhf.RHF):
             oei_derivative = numpy.einsum("pq, pq->", h_dot_g, dm_do[imode])
 
             # one-electron part, diaognal part
-            tmp = numpy.einsum("pp, p->p", dm_do[imode], g_DO[imode])
-            tmp = 2.0 * numpy.einsum("p,q->", tmp, tmp)
-            tmp -= numpy.einsum("pq, pq, p, q->", dm_do[imode], dm_do[imode], g_DO[imode], g_DO[imode])
+            # 2 (sum_p D_pp g_p)^2 - sum_pq D_pq^2 g_p g_q
+            tmp = 2.0 * numpy.dot(numpy.diagonal(dm_do[imode]), g_DO[imode]) ** 2
+            tmp -= g_DO[imode] @ numpy.square(dm_do[imode]) @ g_DO[imode]
             # oei_derivative += tmp / self.qed.omega[imode]
 
             onebody_dvsq[imode] += oei_derivative
 
             # two-electron part
-            derivative = self.gaussian_derivative_sq_vector(self.eta, imode, onebody=False)
-            derivative *= (2.0 * self.eri_DO - self.eri_DO.transpose(0, 3, 2, 1))
-            tmp = lib.einsum('pqrs, rs-> pq', derivative, dm_do[imode], optimize=True)
-            tmp = lib.einsum('pq, pq->', tmp, dm_do[imode], optimize=True)
-            twobody_dvsq[imode] = tmp / 4.0
+            twobody_dvsq[imode] = numpy.vdot(tpq[imode], dm_do[imode]) / 4.0
 
         self.vsq_grad = onebody_dvsq + twobody_dvsq
 
@@ -312,41 +303,30 @@ class RHF(scqedhf.RHF):
         if not self.qed.optimize_varf:
             return
 
-        # gradient w.r.t f_\alpha
+        # gradient w.r.t f_\alpha, all modes at once
         nmodes = self.qed.nmodes
-        onebody_dvlf = numpy.zeros(nmodes)
-        twobody_dvlf = numpy.zeros(nmodes)
+        fscale = self.qed.omega[:nmodes] * self.qed.couplings_var[:nmodes]
+        dm_diag = numpy.diagonal(dm_do, axis1=1, axis2=2)
 
-        for a in range(nmodes):
+        # one-electron part; only the FC derivatives are built mode by mode
+        derivative = numpy.stack([self.gaussian_derivative_f_vector(self.eta, a) for a in range(nmodes)])
+        onebody_dvlf = numpy.einsum("mpq, pq, mpq->m", derivative, self.h1e_DO, dm_do, optimize=True)
+        del derivative
 
-            tau = numpy.exp(self.qed.squeezed_var[a])
-            if abs(self.qed.couplings_var[a]) > 1.e-5:
-                g2_dot_D = 2.0 * numpy.einsum("pp, p->", dm_do[a], g_DO[a]**2)
-                onebody_dvlf[a] += g2_dot_D / self.qed.omega[a] / self.qed.couplings_var[a]
+        # 2 (sum_p D_pp g_p)^2 - sum_pq D_pq^2 g_p g_q
+        tmp = 2.0 * numpy.einsum("mp, mp->m", dm_diag, g_DO) ** 2
+        tmp -= numpy.einsum("mp, mpq, mq->m", g_DO, numpy.square(dm_do), g_DO, optimize=True)
+        onebody_dvlf += tmp / fscale
 
-            # one-electron part
-            derivative = self.gaussian_derivative_f_vector(self.eta, a)
-
-            h_dot_g = self.h1e_DO * derivative  # element_wise
-            oei_derivative = numpy.einsum("pq, pq->", h_dot_g, dm_do[a])
-            tmp = numpy.einsum("pp, p->p", dm_do[a], g_DO[a])
-            tmp = 2.0 * numpy.einsum("p,q->", tmp, tmp)
-            tmp -= numpy.einsum(
-                "pq, pq, p, q->", dm_do[a], dm_do[a], g_DO[a], g_DO[a]
-            )
-            oei_derivative += tmp / self.qed.omega[a] / self.qed.couplings_var[a]
-
-            onebody_dvlf[a] += oei_derivative
-
-            # two-electron part
-            derivative = self.gaussian_derivative_f_vector(self.eta, a, onebody=False)
-            derivative *= (2.0 * self.eri_DO - self.eri_DO.transpose(0, 3, 2, 1))
+        mask = abs(self.qed.couplings_var[:nmodes]) > 1.e-5
+        g2_dot_D = 2.0 * numpy.einsum("mp, mp->m", dm_diag, g_DO**2)
+        onebody_dvlf[mask] += g2_dot_D[mask] / fscale[mask]
 
-            tmp = lib.einsum("pqrs, rs-> pq", derivative, dm_do[a], optimize=True)
-            tmp = lib.einsum("pq, pq->", tmp, dm_do[a], optimize=True)
-            twobody_dvlf[a] = tmp / 4.0
+        # two-electron part of all modes, sharing the eri_DO blocks
+        tpq = self.get_fc_deriv_jk_do(self.gaussian_derivative_f_vector, range(nmodes), dm_do)
+        twobody_dvlf = numpy.einsum("mpq, mpq->m", tpq, dm_do) / 4.0
 
-            self.vlf_grad[a] = onebody_dvlf[a] + twobody_dvlf[a]
+        self.vlf_grad[:nmodes] = onebody_dvlf + twobody_dvlf
 
         if abs(1.0 - self.qed.couplings_var[0]) > 1.0e-4 and self.vhf_dse is not None:
             # only works for nmode == 1
@@ -362,9 +342,9 @@ class RHF(scqedhf.RHF):
 
 
     def norm_var_params(self):
-        var_norm = linalg.norm(self.eta_grad) / numpy.sqrt(self.eta.size)
-        var_norm += linalg.norm(self.vlf_grad) / numpy.sqrt(self.vlf_grad.size)
-        var_norm += linalg.norm(self.vsq_grad) / numpy.sqrt(self.vsq_grad.size)
+        var_norm = linalg.norm(self.eta_grad.ravel(), check_finite=False) / numpy.sqrt(self.eta.size)
+        var_norm += linalg.norm(self.vlf_grad, check_finite=False) / numpy.sqrt(self.vlf_grad.size)
+        var_norm += linalg.norm(self.vsq_grad, check_finite=False) / numpy.sqrt(self.vsq_grad.size)
         return var_norm
 
 
@@ -468,8 +448,6 @@ class RHF(scqedhf.RHF):
         It is obvious that the VT-QEDHF WF is no longer the single produc state
 
         """
-        import math
-
         mocc = mo_coeff[:,mo_occ>0]
         rho = (mocc*mo_occ[mo_occ>0]).dot(mocc.conj().T)
 
@@ -477,27 +455,29 @@ class RHF(scqedhf.RHF):
         imode = 0
 
         U = self.ao2dipole[imode]
-        Uinv = linalg.inv(U)
         # transform into Dipole
         rho_DO = scqedhf.unitary_transform(U, rho)
 
         tau = numpy.exp(self.qed.squeezed_var[imode])
-        rho_tot = numpy.zeros((nfock, nao, nfock, nao))
-        for m in range(nfock):
-            for n in range(nfock):
-                # <m | D(z_alpha) |0>
-                zalpha = tau * self.qed.couplings_var[imode] * self.eta[imode]
-                zalpha /= self.qed.omega[imode]
-
-                z0 = numpy.exp(-0.5 * zalpha ** 2)
-                zm = z0 * zalpha ** m * numpy.sqrt(math.factorial(m))
-                # zn = z0 * (-zalpha) ** n * numpy.sqrt(math.factorial(n))
-                zn = z0 * (zalpha) ** n * numpy.sqrt(math.factorial(n))
-
-                rho_tmp = rho_DO * numpy.outer(zm, zn)
-                # back to AO
-                rho_tmp = scqedhf.unitary_transform(Uinv, rho_tmp)
-                rho_tot[m, :, n, :] = rho_tmp
+
+        # <m | D(z_alpha) |0> for all m at once, shape (nfock, nao)
+        zalpha = tau * self.qed.couplings_var[imode] * self.eta[imode]
+        zalpha /= self.qed.omega[imode]
+
+        z0 = numpy.exp(-0.5 * zalpha ** 2)
+        m = numpy.arange(nfock)[:, None]
+        zm = z0 * zalpha ** m * numpy.exp(0.5 * special.gammaln(m + 1))
+        # zn = z0 * (-zalpha) ** n * numpy.sqrt(math.factorial(n))
+        zn = zm
+
+        # rho_DO * outer(zm[m], zn[n]) for every (m, n), back to AO with a
+        # single broadcast matmul written straight into the (m, p, n, q) layout
+        rho_tmp = numpy.multiply(zm[:, None, :, None] * rho_DO, zn[None, :, None, :])
+        Uinv = self.ao2dipole_inv[imode]
+        rho_tmp = numpy.matmul(Uinv.T, rho_tmp)
+        rho_tot = numpy.empty((nfock, nao, nfock, nao), dtype=rho_tmp.dtype)
+        numpy.matmul(rho_tmp, Uinv, out=rho_tot.transpose(0, 2, 1, 3))
+        del rho_tmp
 
         rho_e = numpy.einsum("mpmq->pq", rho_tot)
         rho_b = numpy.einsum("mpnp->mn", rho_tot) / numpy.trace(rho_e)
@@ -0,0 +1,62 @@
+#
+# @ 2023. Triad National Security, LLC. All rights reserved.
+#
+# This program was produced under U.S. Government contract 89233218CNA000001
+# for Los Alamos National Laboratory (LANL), which is operated by Triad
+# National Security, LLC for the U.S. Department of Energy/National Nuclear
+# Security Administration. All rights in the program are reserved by Triad
+# National Security, LLC, and the U.S. Department of Energy/National Nuclear
+# Security Administration. The Government is granted for itself and others acting
+# on its behalf a nonexclusive, paid-up, irrevocable worldwide license in this
+# material to reproduce, prepare derivative works, distribute copies to the
+# public, perform publicly and display publicly, and to permit others to do so.
+#
+# Author: Yu Zhang <zhy@lanl.gov>
+#
+
+r"""
+Array module used by the QMC solvers
+------------------------------------
+
+The QMC code writes all tensor operations as ``backend.xxx``. By default,
+``backend`` is numpy. Setting the environment variable ``OPENMS_QMC_BACKEND=cupy``
+(before importing openms.qmc) makes it cupy, so that the walkers and the
+integrals moved to the device in :meth:`QMCbase.build` are propagated on the GPU.
+
+.. note::
+
+   The GPU path is experimental: integrals and the trial WF are still built
+   with pyscf/scipy on the host and are transferred with :func:`to_device`.
+   Matrix exponentials of the one-body operators and the population control
+   also run on the host. It is covered by a smoke test that is skipped when
+   cupy is not installed.
+"""
+
+import os
+import warnings
+import numpy
+
+backend = numpy
+
+_name = os.environ.get("OPENMS_QMC_BACKEND", "numpy").lower()
+if _name == "cupy":
+    try:
+        import cupy
+
+        backend = cupy
+    except ImportError:
+        warnings.warn("OPENMS_QMC_BACKEND=cupy but cupy is not available, using numpy")
+elif _name != "numpy":
+    raise ValueError(f"Unknown QMC backend {_name}, must be numpy or cupy")
+
+
+def to_device(a):
+    r"""Move a (host) array to the selected backend"""
+    return backend.asarray(a)
+
+
+def to_host(a):
+    r"""Return a numpy array, copying from the device if needed"""
+    if hasattr(a, "get"):
+        return a.get()
+    return numpy.asarray(a)
@@ -191,17 +191,16 @@ class AFQMC(qmc.QMCbase):
         )
 
         # shifted h1e
-        shifted_h1e = backend.zeros(h1e.shape)
         rho_mf = self.trial.psi.dot(self.trial.psi.T.conj())
-        self.mf_shift = 1j * backend.einsum("npq,pq->n", ltensor, rho_mf)
+        self.mf_shift = 1j * backend.einsum("npq,pq->n", ltensor, rho_mf, optimize=True)
 
-        trace_eri = backend.einsum("npr,nrq->pq", ltensor.conj(), ltensor)
+        trace_eri = backend.einsum("npr,nrq->pq", ltensor.conj(), ltensor, optimize=True)
         shifted_h1e = h1e - 0.5 * trace_eri
-        shifted_h1e = shifted_h1e - backend.einsum(
-            "n, npq->pq", self.mf_shift, 1j * ltensor
+        shifted_h1e = shifted_h1e - 1j * backend.einsum(
+            "n, npq->pq", self.mf_shift, ltensor, optimize=True
         )
 
-        self.TL_tensor = backend.einsum("pr, npq->nrq", self.trial.psi.conj(), ltensor)
+        self.TL_tensor = backend.matmul(self.trial.psi.conj().T, ltensor)
         self.exp_h1e = scipy.linalg.expm(-self.dt / 2.0 * shifted_h1e)
         logger.debug(
             self, "norm of shifted_h1e: %15.8f", backend.linalg.norm(shifted_h1e)
@@ -236,32 +235,31 @@ class AFQMC(qmc.QMCbase):
 
         # b): 2-body propagator propagation :math:`\exp[(x-\bar{x}) * L]`
         # normally distributed AF
-        xi = backend.random.normal(0.0, 1.0, self.nfields * walkers.nwalkers)
-        xi = xi.reshape(walkers.nwalkers, self.nfields)
+        xi = backend.random.standard_normal((walkers.nwalkers, self.nfields))
 
         xshift = xi - xbar
-        # TODO: further improve the efficiency of this part
-        two_body_op_power = (
-            1j * backend.sqrt(self.dt) * backend.einsum("zn, npq->zpq", xshift, ltensor)
-        )
+        # (z, n) x (n, pq) GEMM on the flattened Cholesky tensor
+        nchol, nao = ltensor.shape[:-1]
+        two_body_op_power = backend.dot(xshift, ltensor.reshape(nchol, -1))
+        two_body_op_power *= 1j * backend.sqrt(self.dt)
+        two_body_op_power = two_body_op_power.reshape(walkers.nwalkers, nao, nao)
 
         # \sum_n 1/n! (j\sqrt{\Delta\tau) xL)^n
         temp = walkers.phiw.copy()
+        buf = backend.empty_like(temp)
         for order_i in range(self.taylor_order):
-            temp = backend.einsum("zpq, zqr->zpr", two_body_op_power, temp) / (
-                order_i + 1.0
-            )
-            walkers.phiw += temp
+            backend.matmul(two_body_op_power, temp, out=buf)
+            buf /= order_i + 1.0
+            walkers.phiw += buf
+            temp, buf = buf, temp
 
         # c):  1-body propagator propagation e^{-dt/2*H1e}
         walkers.phiw = self.propagation_onebody(walkers.phiw)
         # walkers.phiw = backend.exp(-self.dt * nuc) * walkers.phiw
 
         # (x*\bar{x} - \bar{x}^2/2)
-        cfb = backend.einsum("zn, zn->z", xi, xbar) - 0.5 * backend.einsum(
-            "zn, zn->z", xbar, xbar
-        )
-        cmf = -backend.sqrt(self.dt) * backend.einsum("zn, n->z", xshift, self.mf_shift)
+        cfb = (xi * xbar).sum(axis=1) - 0.5 * (xbar * xbar).sum(axis=1)
+        cmf = -backend.sqrt(self.dt) * backend.dot(xshift, self.mf_shift)
 
         # updaet_weight and apply phaseless approximation
         self.update_weight(ovlp, cfb, cmf)
@@ -443,8 +441,11 @@ class QEDAFQMC(AFQMC):
         ao_overlap = self.mol.intor("int1e_ovlp")
         self.ao_coeff = lo.orth.lowdin(ao_overlap)
 
-        # This is the fcidump way of doing things. Everything here is in AO basis
-        h1e, eri = self.make_read_fcidump(self.NAO)
+        # h1e and eri in the Lowdin (OAO) basis, transformed in memory rather
+        # than written to and parsed back from an FCIDUMP file
+        C = self.ao_coeff
+        h1e = C.T @ scf.hf.get_hcore(self.mol) @ C
+        eri = ao2mo.kernel(self.mol, C, compact=False).reshape((self.NAO,) * 4)
 
         if self.coherent_state:
             # substract the mean-field reference (coherent state)
@@ -25,15 +25,14 @@ class BAFQMC(qmc.QMCBase):
         )
 
         # shifted h1b
-        shifted_h1b = backend.zeros(h1b.shape)
         rho_mf = self.trial.psi.dot(self.trial.psi.T.conj())
-        self.mf_shift = 1j * backend.einsum("npq,pq->n", ltensor, rho_mf)
+        self.mf_shift = 1j * backend.einsum("npq,pq->n", ltensor, rho_mf, optimize=True)
 
-        traceV = backend.einsum('npr,nrq->pq', ltensor.conj(), ltensor)
+        traceV = backend.einsum('npr,nrq->pq', ltensor.conj(), ltensor, optimize=True)
         shifted_h1b = h1b - 0.5 * traceV
-        shifted_h1b -= backend.einsum("n, npq->pq", self.mf_shift, 1j * ltensor)
+        shifted_h1b -= 1j * backend.einsum("n, npq->pq", self.mf_shift, ltensor, optimize=True)
 
-        self.TL_tensor = backend.einsum("pr, npq->nrq", self.trial.psi.conj(), ltensor)
+        self.TL_tensor = backend.matmul(self.trial.psi.conj().T, ltensor)
         self.exp_h1b = scipy.linalg.expm(-self.dt / 2.0 * shifted_h1b)
         logger.debug(
             self, "norm of shifted_h1b: %15.8f", backend.linalg.norm(shifted_h1b)
@@ -45,7 +44,7 @@ class BAFQMC(qmc.QMCBase):
 
     def propagation_onebody(self, phi_w):
         r"""Propgate one-body term"""
-        return backend.einsum("pq, zqr->zpr", self.exp_h1b, phi_w)
+        return backend.matmul(self.exp_h1b, phi_w)
 
     def propagation_twobody(self, vbias, phi_w):
         r"""Propgate two-body term"""
@@ -1,4 +1,4 @@
-import numpy as backend
+from openms.qmc._backend import backend
 import numpy as np
 import scipy
 import time
@@ -92,7 +92,7 @@ def bosonic_GF(T, W):
 
     # TODO:
     TW = backend.dot(W.T, T.conj())
-    Ghalf = backend.dot(scipy.linalg.inv(TW), W.T)
+    Ghalf = backend.dot(backend.linalg.inv(TW), W.T)
     Gf = backend.dot(T.conj(), Ghalf)
     return Gf, Ghalf
 
@@ -126,7 +126,7 @@ def GF(T, W):
     """
 
     TW = backend.dot(W.T, T.conj())
-    Ghalf = backend.dot(scipy.linalg.inv(TW), W.T)
+    Ghalf = backend.dot(backend.linalg.inv(TW), W.T)
     Green = backend.dot(T.conj(), Ghalf)
 
     return Green, Ghalf
@@ -240,6 +240,14 @@ def local_eng_eb_1st(h1e, eri, gmat, mass, freq, Gf, Q, laplacian, spin_fac=0.5)
 # bosonic energy estimators
 # -----------------------------
 
+def rowwise_dot(a, b):
+    r"""Return :math:`\sum_n a_{zn} b_{zn}` for every z (no conjugation)
+
+    Runs as a batched GEMV without materializing the product ``a * b``.
+    """
+    return backend.matmul(a[:, None, :], b[:, :, None]).reshape(a.shape[0])
+
+
 def e_rh1e_Ghalf(rh1e, Ghalf):
     r"""compute one body energy using rotated_h1e and Ghalf
     """
@@ -270,7 +278,9 @@ def local_energy_SD_RHF(trial, walkers, enuc = 0.0):
     # exchange
     exx = 2.0 * exx_rltensor_Ghalf(trial.rltensora, walkers.Ghalfa)
 
-    e2 = ecoul - exx
+    # e2 = ecoul - exx, accumulated in place
+    ecoul -= exx
+    e2 = ecoul
 
     return e1, e2
 
@@ -299,7 +309,7 @@ def ecoul_rltensor_uhf(rltensora, Ghalfa, rltensorb=None, Ghalfb=None):
             tmpb = Ghalfb.reshape((nwalkers, -1))
             LG += backend.dot(tmpb, rltensorb.reshape((nchol, -1)).T)
         # (nwalkers, nchol)
-        ecoul = 0.5 * backend.sum(LG * LG, axis=1)
+        ecoul = 0.5 * rowwise_dot(LG, LG)
     return ecoul
 
 #from numba import njit
@@ -411,15 +421,17 @@ def exx_rltensor_Ghalf(rltensor, Ghalf):
         # Compute exchange contribution
         exx = 0.5 * backend.einsum('znij, znji->z', LG, LG)
     else:
-        nwalkers = Ghalf.shape[0]
+        nwalkers, nao, nocc = Ghalf.shape
         nchol = rltensor.shape[0]
-        exx = backend.zeros(nwalkers, dtype=backend.complex128)
-        for i in range(nwalkers):
-            for l in range(nchol):
-                LG = backend.dot(rltensor[l].T, Ghalf[i]) # ij
-                exx[i] += backend.dot(LG.ravel(), LG.T.ravel())
-                # LG = rltensor[l].T @ Ghalf[i]
-                # exx[i] += np.sum(LG * LG.T)
+        # f^\gamma = L^T_\gamma G for all gamma as one GEMM per block of walkers,
+        # [nchol * nocc, nao] x [w, nao, nocc] -> [w, nchol, nocc, nocc]
+        rlT = rltensor.transpose(0, 2, 1).reshape(nchol * nocc, nao)
+        blksize = max(1, min(nwalkers, int(1e8 / (16 * nchol * nocc * nocc))))
+        exx = backend.empty(nwalkers, dtype=backend.complex128)
+        for w0 in range(0, nwalkers, blksize):
+            w1 = min(w0 + blksize, nwalkers)
+            LG = backend.matmul(rlT, Ghalf[w0:w1]).reshape(w1 - w0, nchol, nocc, nocc)
+            exx[w0:w1] = (LG * LG.transpose(0, 1, 3, 2)).sum(axis=(1, 2, 3))
         exx *= 0.5
 
     return exx
@@ -479,7 +491,9 @@ def local_energy_SD_UHF(trial, walkers, enuc = 0.0):
     exx = exx_rltensor_Ghalf(trial.rltensora, walkers.Ghalfa)
     exx += exx_rltensor_Ghalf(trial.rltensorb, walkers.Ghalfb)
 
-    e2 = ecoul - exx
+    # e2 = ecoul - exx, accumulated in place
+    ecoul -= exx
+    e2 = ecoul
 
     # print(f"Debug: e1 = {e1}")
     # print(f"Debug: ecoul = {ecoul}")
@@ -578,12 +592,12 @@ def local_eng_elec_chol_new(h1e, ltensor, Gf):
            = L^*_{n, pr} * G_{ps} * [L_{n, qs} * G_{qr}]
     """
     vj = backend.einsum("nrs, zrs->zn", ltensor, Gf)
-    ej = 2.0 * backend.sum(vj * vj, axis=1)
+    ej = 2.0 * rowwise_dot(vj, vj)
 
     # ek is the major bottleneck
     # may replace it with c++ code
     vk = backend.einsum("npr, zps->znrs", ltensor.conj(), Gf)
-    ek = backend.einsum("znpr, znrp->z", vk, vk)
+    ek = (vk * vk.transpose(0, 1, 3, 2)).sum(axis=(1, 2, 3))
 
     # this version uses less memory
     """
@@ -597,7 +611,8 @@ def local_eng_elec_chol_new(h1e, ltensor, Gf):
     """
 
     # one-body term
-    e1 = 2.0 * backend.einsum("zpq, pq->z", Gf, h1e)
+    nwalkers = Gf.shape[0]
+    e1 = 2.0 * backend.dot(Gf.reshape(nwalkers, -1), h1e.ravel())
     energy = e1 + ej - ek
     return energy
 
@@ -630,8 +645,8 @@ def local_eng_elec_chol(TL_theta, h1e, vbias, Gf):
     which is the TL_Theta tensor in the code
     """
 
-    vbias2 = vbias * vbias
-    ej = 2.0 * backend.einsum("zn->z", vbias2)
+    ej = 2.0 * rowwise_dot(vbias, vbias)
+    # single pass over TL_theta, without materializing the (z, n, p, p) product
     ek = backend.einsum("znpr, znrp->z", TL_theta, TL_theta)
     e2 = ej - ek
 
@@ -644,7 +659,8 @@ def local_eng_elec_chol(TL_theta, h1e, vbias, Gf):
     # vjk -= backend.einsum("prqs, zps->zqr", eri, Gf)  # exchange
     # e2 = backend.einsum("zqs, zqs->z", vjk, Gf)
 
-    e1 = 2.0 * backend.einsum("zpq, pq->z", Gf, h1e)
+    nwalkers = Gf.shape[0]
+    e1 = 2.0 * backend.dot(Gf.reshape(nwalkers, -1), h1e.ravel())
     energy = e1 + e2
     return energy
 
@@ -652,14 +668,20 @@ def local_eng_elec_chol(TL_theta, h1e, vbias, Gf):
 def local_eng_elec(h1e, eri, Gf, spin_fac=0.5):
     r"""Compute local energy of electrons"""
 
-    kin = backend.einsum("zSpq,Spq->z", Gf, h1e) * spin_fac
+    nwalkers = Gf.shape[0]
+    kin = backend.dot(Gf.reshape(nwalkers, -1), h1e.ravel()) * spin_fac
+
+    # both ERI contractions are single GEMMs over the flattened pair indices
+    npair = eri.shape[0] * eri.shape[1]
+    Gflat = Gf.reshape(-1, npair)
 
-    # E_coul
-    tmp = 2.0 * backend.einsum("prqs,zSpr->zqs", eri, Gf) * spin_fac
-    ecoul = backend.einsum("zqs,zSqs->z", tmp, Gf)
-    # E_xx
-    tmp = backend.einsum("prqs,zSps->zSqr", eri, Gf)
-    exx = backend.einsum("zSqs,zSqs->z", tmp, Gf)
+    # E_coul: (pr) x (qs) view of eri
+    Gsum = Gf.sum(axis=1).reshape(nwalkers, npair)
+    tmp = 2.0 * backend.dot(Gsum, eri.reshape(npair, npair)) * spin_fac
+    ecoul = rowwise_dot(tmp, Gsum)
+    # E_xx: (ps) x (qr) view of eri
+    tmp = backend.dot(Gflat, eri.transpose(0, 3, 2, 1).reshape(npair, npair))
+    exx = rowwise_dot(tmp.reshape(nwalkers, -1), Gflat.reshape(nwalkers, -1))
     pot = (ecoul - exx) * spin_fac
 
     return kin + pot
@@ -30,7 +30,7 @@ pop control. Etc.
 
 import sys, time
 from abc import abstractmethod
-import numpy as backend
+from openms.qmc._backend import backend
 from pyscf.lib import logger
 from openms.lib.logger import task_title
 from openms.__mpi__ import MPI, original_print
@@ -98,6 +98,10 @@ class BaseWalkers(object):
         # variables for weights and weights control
         self.weights = backend.ones(self.nwalkers)
         self.weights_org = self.weights.copy()
+        # sum of the unscaled weights, updated together with weights_org
+        self.weights_org_sum = backend.sum(self.weights_org)
+        # scratch for |weights| in weight_control, allocated once
+        self._abs_weights = backend.empty(self.nwalkers)
         self.weight_min = 0.1
         self.weight_max = 10.0
 
@@ -135,7 +139,7 @@ class BaseWalkers(object):
     @property
     def raw_norm(self):
 
-        norm = backend.sum(self.weights_org)
+        norm = self.weights_org_sum
         return self._mpi.comm.allreduce(norm, op=MPI.SUM)
 
     @abstractmethod
@@ -163,7 +167,7 @@ class BaseWalkers(object):
             return
 
         logger.debug(self, f"Debug: pop control at step {step}")
-        weights = backend.abs(self.weights)
+        weights = backend.abs(self.weights, out=self._abs_weights)
         total_weight = backend.sum(weights)
         ratio = total_weight / self.total_weight0
         logger.debug(self, f"Debug: weights control is triggered! ratio is {ratio}")
@@ -173,8 +177,9 @@ class BaseWalkers(object):
             )
 
         self.total_weight = total_weight
-        self.weights_org = self.weights.copy()
-        self.weights = self.weights / ratio
+        self.weights_org[...] = self.weights
+        self.weights_org_sum = backend.sum(self.weights_org)
+        self.weights /= ratio
 
         # print("backend.sum(self.weights_org) = ", backend.sum(self.weights_org))
         # print("backend.sum(self.weights)     = ", backend.sum(self.weights), backend.sum(self.weights_org))
@@ -196,19 +201,29 @@ class BaseWalkers(object):
 
     def _unpack_walkers(self, new_walkers):
         r"""unpack tmp walkers into phiwa/b and boson_phiw
+
+        The resampled walkers are written back into the existing
+        ``[nwalkers, ...]`` arrays in place, so that ``phiwa``/``phiwb``
+        remain views of ``phiw`` and every walker quantity keeps the
+        walker index as its leading (contiguous) dimension.
         """
+        assert len(new_walkers) == self.nwalkers, \
+            f"expected {self.nwalkers} walkers after population control, got {len(new_walkers)}"
+
         if self.boson_phiw is not None and self.ncomponents > 1:
-            self.phiwa = backend.array([new_walkers[i][0] for i in range(self.nwalkers)])
-            self.phiwb = backend.array([new_walkers[i][1] for i in range(self.nwalkers)])
-            self.boson_phiw = backend.array([new_walkers[i][2] for i in range(self.nwalkers)])
+            phiwa, phiwb, boson_phiw = (backend.stack(x) for x in zip(*new_walkers))
         elif self.boson_phiw is None and self.ncomponents > 1:
-            self.phiwa = backend.array([new_walkers[i][0] for i in range(self.nwalkers)])
-            self.phiwb = backend.array([new_walkers[i][1] for i in range(self.nwalkers)])
+            phiwa, phiwb = (backend.stack(x) for x in zip(*new_walkers))
         elif self.boson_phiw is not None and self.ncomponents == 1:
-            self.phiwa = backend.array([new_walkers[i][0] for i in range(self.nwalkers)])
-            self.boson_phiw = backend.array([new_walkers[i][1] for i in range(self.nwalkers)])
+            phiwa, boson_phiw = (backend.stack(x) for x in zip(*new_walkers))
         else:
-            self.phiwa = backend.array([new_walkers[i] for i in range(self.nwalkers)])
+            phiwa = backend.stack(new_walkers)
+
+        self.phiwa[...] = phiwa
+        if self.ncomponents > 1:
+            self.phiwb[...] = phiwb
+        if self.boson_phiw is not None:
+            self.boson_phiw[...] = boson_phiw
 
 
 from openms.qmc.trial import multiCI
@@ -221,6 +236,13 @@ class Walkers_so(BaseWalkers):
     or fermion-boson mixture walkers
 
     Walker shape: [nwalker, n_AO, n_electron]
+
+    The alpha and beta determinants are stored in one array ``phiw`` and
+    ``phiwa``/``phiwb`` are views of its first ``nalpha`` and last ``nbeta``
+    columns. All per-walker arrays (``phiw``, ``weights``, ``ovlp``, Green's
+    functions, ...) have the walker index as the leading dimension, so
+    propagation and measurement act on the whole ensemble at once and should
+    update the walkers in place (``phiwa[...] = ...``) to keep the views valid.
     """
 
     def __init__(self, trial, **kwargs):
@@ -3,6 +3,7 @@ import copy
 import numpy
 import numpy as np
 import random
+from openms.qmc._backend import to_device, to_host
 
 
 def branching_dp_dynamics(walkers, weights, min_weight=0.2, max_weight=2.0):
@@ -442,12 +443,13 @@ def population_control_factory(walkers, method="branching"):
         # print(f"Sum(weights) before control: {backend.sum(walkers.weights):.3f}")
 
         # pack the walker WF (phiwa, phib, boson_phiw) in one list
+        # (the resampling itself is done with numpy on the host weights)
         packed_walkers = walkers._pack_walkers()
-        new_walkers, weights = control_func(packed_walkers, walkers.weights)
+        new_walkers, weights = control_func(packed_walkers, to_host(walkers.weights))
 
         # updte walker WF and weights
         walkers._unpack_walkers(new_walkers)
-        walkers.weights = weights
+        walkers.weights = to_device(weights)
 
 
 
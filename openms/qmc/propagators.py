@@ -1,7 +1,9 @@
 import itertools
 import time
+import h5py
 from pyscf.lib import logger
-import numpy as backend
+import numpy
+from openms.qmc._backend import backend, to_device, to_host
 import scipy
 
 from openms.lib.logger import task_title
@@ -59,6 +61,80 @@ def boson_adag_plus_a(nmodes, boson_states, za):
 
     return Hb
 
+def is_cupy(a):
+    r"""Check whether the array is a cupy (GPU) array"""
+    return type(a).__module__.split(".")[0] == "cupy"
+
+
+def get_array_module(a):
+    r"""Return cupy for GPU arrays and numpy otherwise
+
+    The propagation kernels dispatch on their inputs, so walkers and
+    operators that live on the GPU are propagated there without transfers.
+    """
+    if is_cupy(a):
+        import cupy
+
+        return cupy
+    return numpy
+
+
+def hs_operator(xshift, ltensor, blksize=None):
+    r"""Return :math:`\sum_n x_{zn} L_{n,pq}` with shape [nwalkers, nao*nao]
+
+    The GEMMs run in the precision of ltensor (single if mixed_precision is
+    used). If ltensor is an h5py dataset, the chols are streamed from disk
+    in blocks of ``blksize`` fields (about 100 MB by default) instead of
+    being kept in memory.
+    """
+    nchol, nao = ltensor.shape[:-1]
+    if isinstance(ltensor, h5py.Dataset):
+        if blksize is None:
+            blksize = int(1e8 / (ltensor.dtype.itemsize * nao * nao))
+        blksize = max(1, min(nchol, blksize))
+        op = 0
+        for p0 in range(0, nchol, blksize):
+            p1 = min(p0 + blksize, nchol)
+            op = op + hs_operator(xshift[:, p0:p1], ltensor[p0:p1])
+        return op
+
+    xp = get_array_module(ltensor)
+    lmat = ltensor.reshape(nchol, -1)
+    if xp.iscomplexobj(lmat):
+        op = xp.dot(xshift.astype(lmat.dtype, copy=False), lmat)
+        return op.astype(xshift.dtype, copy=False)
+    # real chols: two real GEMMs instead of casting ltensor to complex every step
+    op = xp.empty((xshift.shape[0], lmat.shape[1]), dtype=xshift.dtype)
+    op.real = xp.dot(xshift.real.astype(lmat.dtype), lmat)
+    op.imag = xp.dot(xshift.imag.astype(lmat.dtype), lmat)
+    return op
+
+
+def expm_onebody(h, tau):
+    r"""Compute :math:`e^{\tau h}` for a (stack of) one-body matrices
+
+    The shifted one-body Hamiltonian is usually real even though it is stored
+    as complex (the mean-field shift is purely imaginary for real Cholesky
+    vectors). In that case, the exponential is taken in real arithmetic,
+    which is several times cheaper than the complex one, and cast back to
+    the dtype of :math:`\tau h`.
+
+    The exponential is taken with scipy on the host, and the result is moved
+    back to the QMC backend (a no-op for numpy).
+
+    h: (..., n, n) array
+    tau: scalar
+
+    return:
+    exp_h: (..., n, n) array
+    """
+    h = to_host(h)
+    dtype = numpy.result_type(h.dtype, tau)
+    if numpy.iscomplexobj(h) and not numpy.any(h.imag):
+        h = h.real
+    return to_device(scipy.linalg.expm(tau * h).astype(dtype, copy=False))
+
+
 def propagate_onebody(op, phi):
     r""" Base function for propagating onebody operator
 
@@ -70,12 +146,11 @@ def propagate_onebody(op, phi):
 
     """
 
-    # The loop is faster than the einsum
-    if False: # TODO: determine which method to contract the tensor
-        phi = backend.einsum("pq, zqr->zpr", op, phi)
-    else:
-        for iw in range(phi.shape[0]):
-            phi[iw] = backend.dot(op, phi[iw])
+    # matmul broadcasts op over the walkers with one GEMM each, much faster
+    # than the einsum and without the Python loop. phi is updated in place,
+    # as it may be a view of the full walker WF.
+    xp = get_array_module(phi)
+    phi[...] = xp.matmul(op, phi)
     return phi
 
 
@@ -111,7 +186,7 @@ def propagate_effective_oei(phi, system, bt2, H1diag=False):
     return
 
 
-def propagate_exp_op(phiw, op, order):
+def propagate_exp_op(phiw, op, order, dtype=None):
     r"""action of exponential operator on (walker) wavefunction
 
     .. math::
@@ -119,19 +194,26 @@ def propagate_exp_op(phiw, op, order):
 
     op in the input is the operator :math:`A`. :math:`\ket{\phi_w}` is the
     walker WF.
+
+    If dtype is given (e.g., complex64), the Taylor terms are computed in
+    that precision and accumulated into phiw, which keeps its own dtype.
     """
 
-    if False:
+    # one batched matmul over all walkers per order instead of a loop of
+    # small GEMMs, ~3x faster for small nao. phiw is updated in place and the
+    # Taylor terms ping-pong between two buffers.
+    xp = get_array_module(phiw)
+    if dtype is None:
         temp = phiw.copy()
-        for i in range(order):
-            temp = backend.einsum("zpq, zqr->zpr", op, temp) / (i + 1.0)
-            phiw += temp
     else:
-        for iw in range(phiw.shape[0]):
-            temp = phiw[iw].copy()
-            for i in range(order):
-                temp = backend.dot(op[iw], temp) / (i + 1.0)
-                phiw[iw] += temp
+        temp = phiw.astype(dtype)
+        op = op.astype(dtype, copy=False)
+    buf = xp.empty_like(temp)
+    for i in range(order):
+        xp.matmul(op, temp, out=buf)
+        buf /= i + 1.0
+        phiw += buf
+        temp, buf = buf, temp
 
     return phiw
 
@@ -154,6 +236,9 @@ class PropagatorBase(object):
         self.stdout = kwargs.get("stdout", 1)
         self.energy_scheme = kwargs.get("energy_scheme", "hybrid")
         self.taylor_order = kwargs.get("taylor_order", 6)
+        # precision of the Taylor terms of the HS propagator, e.g. complex64;
+        # the walker WFs, overlaps and weights always stay in double
+        self.taylor_dtype = kwargs.get("taylor_dtype", None)
         self.bias_bound = kwargs.get("bias_bound", 1.0)
         self.num_fake_fields = kwargs.get("num_fake_fields", 0)
         self.ebound = (2.0 / self.dt) ** 0.5
@@ -219,14 +304,13 @@ class PropagatorBase(object):
         self.nfields = ltensor.shape[0]
         nao = ltensor.shape[1]
 
-        shifted_h1e = backend.zeros(h1e.shape)
         # FIXME: Note: if we spin orbital, the rho_mf's diagonal term is 2
         # while if not (i.e., rhf), the diagonal term is 1
         # need to decide how to deal with the factor of 2 in rhf case
         rho_mf = trial.psi.dot(trial.psi.T.conj()) * 2.0 / trial.ncomponents
 
         # rho_mf = trial.Gf[0] + trial.Gf[1] # we can also use Gf to get rho_mf
-        self.mf_shift = 1j * backend.einsum("npq,pq->n", ltensor, rho_mf)
+        self.mf_shift = 1j * backend.einsum("npq,pq->n", ltensor, rho_mf, optimize=True)
 
         # logger.debug(self, f"Debug: psi = {trial.psi}")
         # logger.debug(self, f"Debug: rho_mf = {rho_mf}")
@@ -234,12 +318,10 @@ class PropagatorBase(object):
 
         # shift due to eri
         if self.nbarefields > 0:
-            trace_eri = backend.einsum("npr,nrq->pq", ltensor[:self.nbarefields].conj(), ltensor[:self.nbarefields])
+            trace_eri = backend.einsum("npr,nrq->pq", ltensor[:self.nbarefields].conj(), ltensor[:self.nbarefields], optimize=True)
         else:
-            trace_eri = backend.einsum("npr,nrq->pq", ltensor.conj(), ltensor)
+            trace_eri = backend.einsum("npr,nrq->pq", ltensor.conj(), ltensor, optimize=True)
         shifted_h1e = h1e - 0.5 * trace_eri
-        # for p, q in itertools.product(range(h1e.shape[0]), repeat=2):
-        #    shifted_h1e[p, q] = h1e[p, q] - 0.5 * backend.trace(eri[p, :, :, q])
 
         if len(h1e.shape) == 3:
             logger.debug(
@@ -251,12 +333,12 @@ class PropagatorBase(object):
         )
 
         # extract the mean-field shift
-        shifted_h1e = shifted_h1e - backend.einsum(
-            "n, npq->pq", self.mf_shift, 1j * ltensor
+        shifted_h1e = shifted_h1e - 1j * backend.einsum(
+            "n, npq->pq", self.mf_shift, ltensor, optimize=True
         )
 
-        self.TL_tensor = backend.einsum("pr, npq->nrq", trial.psi.conj(), ltensor)
-        self.exp_h1e = scipy.linalg.expm(-self.dt / 2.0 * shifted_h1e)
+        self.TL_tensor = backend.matmul(trial.psi.conj().T, ltensor)
+        self.exp_h1e = expm_onebody(shifted_h1e, -self.dt / 2.0)
         self.shifted_h1e = shifted_h1e
 
         logger.debug(self, f"Debug: shape of expH1 = {self.exp_h1e.shape}")
@@ -336,7 +418,10 @@ class Phaseless(PropagatorBase):
             e1, e2 = local_energy_SD_UHF(trial, walkers)
         else:
             e1, e2 = local_energy_SD_RHF(trial, walkers)
-        walkers.eloc = e1 + e2 + enuc
+        # e1 + e2 + enuc with a single (nwalkers,) temporary
+        eloc = e1 + e2
+        eloc += enuc
+        walkers.eloc = eloc
 
         # etot = backend.sum(walkers.weights * walkers.eloc.real)
         etot = backend.dot(walkers.weights, walkers.eloc.real)
@@ -395,11 +480,13 @@ class Phaseless(PropagatorBase):
         # logger.debug(self, f"Debug: phiwb.shape = {walkers.phiwb.shape}")
 
         walkers.phiwa = propagate_onebody(self.exp_h1e[0], walkers.phiwa)
-        logger.debug(self, f"Debug: norm of phiwa after onebody {backend.linalg.norm(walkers.phiwa):.8f}")
+        if self.verbose >= logger.DEBUG:
+            logger.debug(self, f"Debug: norm of phiwa after onebody {backend.linalg.norm(walkers.phiwa):.8f}")
 
         if walkers.ncomponents > 1:
             walkers.phiwb = propagate_onebody(self.exp_h1e[1], walkers.phiwb)
-            logger.debug(self, f"Debug: norm of phiwb after onebody {backend.linalg.norm(walkers.phiwb):.8f}")
+            if self.verbose >= logger.DEBUG:
+                logger.debug(self, f"Debug: norm of phiwb after onebody {backend.linalg.norm(walkers.phiwb):.8f}")
         self.wt_onebody += time.time() - t0
         logger.debug(self, f"Debug: time of propagate onebody: { time.time() - t0}")
 
@@ -414,19 +501,19 @@ class Phaseless(PropagatorBase):
 
         t0 = time.time()
         sqrtdt = 1j * backend.sqrt(self.dt)
-        if True: # using CPU
-            nchol, nao = ltensor.shape[:-1]
-            eri_op = sqrtdt * backend.dot(xshift, ltensor.reshape(nchol, -1)).reshape(walkers.nwalkers, nao, nao)
-        else:
-            eri_op = sqrtdt * backend.einsum("zn, npq->zpq", xshift, ltensor)
+        # GEMMs on either the CPU or the GPU, depending on where ltensor lives
+        nao = ltensor.shape[-1]
+        eri_op = hs_operator(xshift, ltensor)
+        eri_op *= sqrtdt
+        eri_op = eri_op.reshape(walkers.nwalkers, nao, nao)
         logger.debug(self, f"Debug: time of construct VHS: {time.time() - t0}")
         self.wt_chs += time.time() - t0
 
         t0 = time.time()
         # \sum_n 1/n! (j\sqrt{\Delta\tau) xL)^n
-        walkers.phiwa = propagate_exp_op(walkers.phiwa, eri_op, self.taylor_order)
+        walkers.phiwa = propagate_exp_op(walkers.phiwa, eri_op, self.taylor_order, self.taylor_dtype)
         if walkers.ncomponents > 1:
-            walkers.phiwb = propagate_exp_op(walkers.phiwb, eri_op, self.taylor_order)
+            walkers.phiwb = propagate_exp_op(walkers.phiwb, eri_op, self.taylor_order, self.taylor_dtype)
         logger.debug(self, f"Debug: time of propagating twobody exp operator {time.time() - t0}")
         self.wt_phs += time.time() - t0
 
@@ -469,8 +556,8 @@ class Phaseless(PropagatorBase):
         # a) generate normally distributed AF
         # if we compare with electron-boson case, we need to add nmode * nwalker random number in order to
         # have the same random number in each iteration
-        xi = backend.random.normal(0.0, 1.0, (self.nfields + self.num_fake_fields) * walkers.nwalkers)
-        xi = xi.reshape(walkers.nwalkers, self.nfields + self.num_fake_fields)[:, :self.nfields]
+        xi = backend.random.standard_normal((walkers.nwalkers, self.nfields + self.num_fake_fields))
+        xi = xi[:, :self.nfields]
         if self.nfields > self.nbarefields:
             self.xi_bilinear = xi[:, self.nbarefields:self.nfields]
 
@@ -487,9 +574,10 @@ class Phaseless(PropagatorBase):
         xbar = self.rescale_fbias(xbar)  # bound of vbias
         xshift = xi - xbar  # [nwalker, nchol]
 
-        logger.debug(self, f"Debug: mf_shift.shape = {self.mf_shift.shape}")
-        logger.debug(self, f"Debug: vbias.shape = {self.vbias.shape}")
-        logger.debug(self, f"Debug: norm of vbias = {backend.linalg.norm(self.vbias):.8f}")
+        if self.verbose >= logger.DEBUG:
+            logger.debug(self, f"Debug: mf_shift.shape = {self.mf_shift.shape}")
+            logger.debug(self, f"Debug: vbias.shape = {self.vbias.shape}")
+            logger.debug(self, f"Debug: norm of vbias = {backend.linalg.norm(self.vbias):.8f}")
 
         t1 = time.time()
         self.wt_fbias += t1 - t0
@@ -504,11 +592,9 @@ class Phaseless(PropagatorBase):
         # so (x-F)<F> --> cmf
         #    x(F-<F>) - 0.5(F-<F>)^2 -- > cfb
         #    0.5 <F>^2 propability shift
-        cfb = backend.einsum("zn, zn->z", xi, xbar) - 0.5 * backend.einsum(
-            "zn, zn->z", xbar, xbar
-        )
+        cfb = (xi * xbar).sum(axis=1) - 0.5 * (xbar * xbar).sum(axis=1)
         # factors due to MF shift and force bias
-        cmf = -backend.sqrt(self.dt) * backend.einsum("zn, n->z", xshift, self.mf_shift)
+        cmf = -backend.sqrt(self.dt) * backend.dot(xshift, self.mf_shift)
 
         # logger.debug(self, f"norm of cfb :   {backend.linalg.norm(cfb)}")
         # logger.debug(self, f"norm of cmf :   {backend.linalg.norm(cmf)}")
@@ -712,26 +798,25 @@ class PhaselessBoson(Phaseless):
 
         self.num_bfields = chol_b.shape[0]
 
-        shifted_h1b = backend.zeros(h1b.shape)
         brho_mf = trial.psi.dot(trial.psi.T.conj())
-        self.bmf_shift = 1j * backend.einsum("npq,pq->n", chol_b, brho_mf)
+        self.bmf_shift = 1j * backend.einsum("npq,pq->n", chol_b, brho_mf, optimize=True)
 
-        trace_v2b = backend.einsum("nil,njj->il", chol_b.conj(), chol_b)
+        trace_v2b = backend.einsum("nil,njj->il", chol_b.conj(), chol_b, optimize=True)
         shifted_h1b = (
             h1b
             - 0.5 * trace_v2b
-            - backend.einsum("n, npq->pq", self.bmf_shift, 1j * chol_b)
+            - 1j * backend.einsum("n, npq->pq", self.bmf_shift, chol_b, optimize=True)
         )
 
-        self.TL_tensor = backend.einsum("pr, npq->nrq", trial.psi.conj(), chol_b)
-        self.exp_h1b = scipy.linalg.expm(-self.dt / 2 * shifted_h1b)
+        self.TL_tensor = backend.matmul(trial.psi.conj().T, chol_b)
+        self.exp_h1b = expm_onebody(shifted_h1b, -self.dt / 2)
         self.h1b = h1b
 
 
     def propagate_walkers_onebody(self, walkers):
         r"""Propagate one-body term"""
 
-        walkers.phiw = backend.einsum("pq, zqr->zpr", self.exp_h1e, walkers.phiw)
+        walkers.phiw = backend.matmul(self.exp_h1e, walkers.phiw)
 
 
     def propagate_walkers_twobody(self, phiw):
@@ -978,7 +1063,6 @@ class PhaselessElecBoson(Phaseless):
             # or separate the bilinear terms
 
             logger.debug(self, f"\nDebug: build shifted bosonic operators!")
-            rho_mf = trial.psi.dot(trial.psi.T.conj())
             if trial.boson_psi.ndim == 1:
                 boson_rhomf = backend.outer(trial.boson_psi, trial.boson_psi.T.conj())
             else:
@@ -997,8 +1081,8 @@ class PhaselessElecBoson(Phaseless):
             self.nBfields = self.chol_B.shape[0]
             if not self.turnoff_bosons:
                 assert self.nBfields == (self.nfields - self.nbarefields)
-                self.boson_mfshift = 1j * backend.einsum("npq, pq->n", self.chol_B, boson_rhomf)
-                self.shifted_Hb = self.Hb - backend.einsum("n, npq->pq", self.boson_mfshift, 1j * self.chol_B)
+                self.boson_mfshift = 1j * backend.einsum("npq, pq->n", self.chol_B, boson_rhomf, optimize=True)
+                self.shifted_Hb = self.Hb - 1j * backend.einsum("n, npq->pq", self.boson_mfshift, self.chol_B, optimize=True)
                 logger.debug(self, f" boson_mfshift =\n {self.boson_mfshift}")
             else:
                 self.shifted_Hb = self.Hb.copy()
@@ -1032,7 +1116,8 @@ class PhaselessElecBoson(Phaseless):
 
         # update the local energy with eb and eg
         if not self.turnoff_bosons:
-            walkers.eloc += eb + eg
+            walkers.eloc += eb
+            walkers.eloc += eg
 
         # and then update the total energy
         etot = backend.dot(walkers.weights, walkers.eloc.real)
@@ -1191,8 +1276,8 @@ class PhaselessElecBoson(Phaseless):
 
         if not self.decouple_bilinear and self.geb is not None:
             # trace over bosonic DOF
-            # zlambda = backend.einsum("pq, Xpq ->X", walkers.rho, self.geb)
-            oei = backend.einsum("X, Xpq->pq", walkers.Qalpha, self.geb)
+            # zlambda = backend.tensordot(self.geb, walkers.rho, axes=2)
+            oei = backend.tensordot(walkers.Qalpha, self.geb, axes=1)
 
 
         # 2) oei_qed in 1st quantization (TBA)
@@ -1213,7 +1298,7 @@ class PhaselessElecBoson(Phaseless):
 
             # Veph = [backend.diag( backend.exp(const * Qso[0]) ),backend.diag( backend.exp(const * Qso[1]) )]
             # propagate_effective_oei(walkers.phiw, system, Veph, H1diag=True)
-            exp_h1e = [scipy.linalg.expm(-dt * oei[0]), scipy.linalg.expm(-dt * oei[1])]
+            exp_h1e = [expm_onebody(oei[0], -dt), expm_onebody(oei[1], -dt)]
             # print(walkers.phiw.dtype, walker.X.dtype, const)
             propagate_walkers_one_body(walkers.phiw, exp_h1e)
             # propagate_effective_oei(walkers.phiw, system, TV, H1diag=False)
@@ -1240,7 +1325,7 @@ class PhaselessElecBoson(Phaseless):
         if not self.turnoff_bosons:
             # logger.debug(self, f"Debug: shapes of shifted_h1e and oei {self.shifted_h1e.shape} {oei.shape}")
             shifted_h1e = self.shifted_h1e + oei
-            self.exp_h1e = scipy.linalg.expm(-self.dt / 2 * shifted_h1e)
+            self.exp_h1e = expm_onebody(shifted_h1e, -self.dt / 2)
         self.wt_buildh1e += time.time() - t0
 
         # use super() method
@@ -1277,7 +1362,7 @@ class PhaselessElecBoson(Phaseless):
 
         # FIXME; include zlambda or not
         zlambda = backend.ones(nmodes)
-        zlambda = backend.einsum("pq, Xpq ->X", walkers.rho, self.geb)
+        zlambda = backend.tensordot(self.geb, walkers.rho, axes=2)
 
         Hb = boson_adag_plus_a(nmodes, self.system.nboson_states, zlambda)
         # logger.debug(self, f"Hb = {Hb}")
@@ -1286,7 +1371,7 @@ class PhaselessElecBoson(Phaseless):
         # propagate electronic part
         Qalpha = backend.ones(nmodes)
         Qalpha = walkers.Qalpha
-        oei = -dt * backend.einsum("X, Xpq->pq", Qalpha, self.geb)
+        oei = -dt * backend.tensordot(Qalpha, self.geb, axes=1)
         evol_Hep = -dt * Hb
         #TODO: matrix element of <m|e^{-z_\alpha(a^\dag_\alpha + a_\alpha)}|n> can be analytically evaluated
 
@@ -1294,16 +1379,18 @@ class PhaselessElecBoson(Phaseless):
         temp = walkers.phiwa.copy()
         temp2 = walkers.boson_phiw.copy()
         for i in range(self.taylor_order):
-            temp = backend.einsum("pq, zqr->zpr", oei, temp) / (i + 1.0)
+            temp = backend.matmul(oei, temp)
+            temp /= i + 1.0
             walkers.phiwa += temp
             # bosonic part
-            temp2 = backend.einsum("NM, zM->zN", evol_Hep, temp2)
+            temp2 = temp2 @ evol_Hep.T
             walkers.boson_phiw += temp2
 
         if walkers.ncomponents > 1:
             temp = walkers.phiwb.copy()
             for i in range(self.taylor_order):
-                temp = backend.einsum("pq, zqr->zpr", oei, temp) / (i + 1.0)
+                temp = backend.matmul(oei, temp)
+                temp /= i + 1.0
                 walkers.phiwb += temp
 
         """
@@ -1364,14 +1451,15 @@ class PhaselessElecBoson(Phaseless):
         """
         if self.decouple_bilinear:
             # H_b -> H_b + <L^B> L_B + <L^B'> L^B'
-            evol_Hb = scipy.linalg.expm(-dt * self.shifted_Hb)
+            evol_Hb = expm_onebody(self.shifted_Hb, -dt)
         else:
-            evol_Hb = scipy.linalg.expm(-dt * self.Hb)
+            evol_Hb = expm_onebody(self.Hb, -dt)
         walkers.boson_phiw = backend.einsum("mn, zn->zm", evol_Hb, walkers.boson_phiw)
 
         # eloc = local_eng_boson(self.system.boson_freq, self.system.nboson_states, walkers.boson_Gf)
         # walkers.weights *= backend.exp(-dt * eloc.real)
-        logger.debug(self, f"Debug: bosonic WF after free boson:  {abs(backend.sum(walkers.boson_phiw, axis=0)) / walkers.nwalkers}")
+        if self.verbose >= logger.DEBUG:
+            logger.debug(self, f"Debug: bosonic WF after free boson:  {abs(backend.sum(walkers.boson_phiw, axis=0)) / walkers.nwalkers}")
 
 
     def propagate_bosons_1st(self, trial, walkers, dt):
@@ -1526,34 +1614,39 @@ class PhaselessElecBoson(Phaseless):
             #print(f"boson_mfshift = {self.boson_mfshift}")
             #print(f"xbar          = {xbar}")
 
-            op_power = tau * backend.einsum("zn, nNM->zNM", xshift, self.chol_B)
+            nchol, nboson = self.chol_B.shape[:-1]
+            op_power = backend.dot(xshift, self.chol_B.reshape(nchol, -1))
+            op_power *= tau
+            op_power = op_power.reshape(walkers.nwalkers, nboson, nboson)
             #op_power = tau * backend.einsum("zn, nNM->zNM", xi, self.chol_B)
 
             temp = walkers.boson_phiw.copy()
             for order_i in range(self.taylor_order):
-                temp = backend.einsum("zNM, zM->zN", op_power, temp) / (order_i + 1.0)
+                temp = backend.matmul(op_power, temp[:, :, None])[:, :, 0]
+                temp /= order_i + 1.0
                 walkers.boson_phiw += temp
 
             # compute the cfb, cmf for weights updates
-            cfb = backend.einsum("zn, zn->z", xi, xbar) - 0.5 * backend.einsum("zn, zn->z", xbar, xbar)
+            cfb = (xi * xbar).sum(axis=1) - 0.5 * (xbar * xbar).sum(axis=1)
             # factors due to MF shift and force bias
-            cmf = -backend.sqrt(dt) * backend.einsum("zn, n->z", xshift, self.boson_mfshift)
+            cmf = -backend.sqrt(dt) * backend.dot(xshift, self.boson_mfshift)
             #print(f"\nBosonic cfb    = {cfb}")
             #print(f"Bosonic cmf    = {backend.exp(cfb + cmf)}")
         else:
             # Trace over fermionic DOF to construct the photonic (bilinear part) Hamiltonian
             logger.debug(self, f"Debug: propagating the bilinear term in product formalism")
             # may move this part into the propagate_boson
-            zlambda = backend.einsum("pq, Xpq ->X", walkers.rho, self.geb)
+            zlambda = backend.tensordot(self.geb, walkers.rho, axes=2)
             Hb = boson_adag_plus_a(nmodes, self.system.nboson_states, zlambda)
 
             #TODO: matrix element of <m|e^{-z_\alpha(a^\dag_\alpha + a_\alpha)}|n> can be analytically evaluated
             # exp(-\sqrt{w/2} g c^\dag_i c_j (b^\dag + b)) | n>
-            evol_Hep = scipy.linalg.expm(-dt * Hb)
+            evol_Hep = expm_onebody(Hb, -dt)
             walkers.boson_phiw = backend.einsum("NM, zM->zN", evol_Hep, walkers.boson_phiw)
 
         # compute bosonic energy
-        logger.debug(self, f"Debug: bosonic WF after bilinear: {abs(backend.sum(walkers.boson_phiw, axis=0)) / walkers.nwalkers}")
+        if self.verbose >= logger.DEBUG:
+            logger.debug(self, f"Debug: bosonic WF after bilinear: {abs(backend.sum(walkers.boson_phiw, axis=0)) / walkers.nwalkers}")
 
         ## update bilinear part of local energy
         Gfermions = [walkers.Ga, walkers.Gb] if walkers.ncomponents > 1 else [walkers.Ga, walkers.Ga]
@@ -1584,9 +1677,9 @@ class PhaselessElecBoson(Phaseless):
             ovlp *= boson_ovlp
 
         # 2) update Fermionic DM and Qalpha for the bilinear terms
-        walkers.Ga = backend.einsum("zqi, pi->zpq", walkers.Ghalfa, trial.psia.conj())
+        walkers.Ga = backend.matmul(trial.psia.conj(), walkers.Ghalfa.transpose(0, 2, 1))
         if walkers.ncomponents > 1:
-            walkers.Gb = backend.einsum("zqi, pi->zpq", walkers.Ghalfb, trial.psib.conj())
+            walkers.Gb = backend.matmul(trial.psib.conj(), walkers.Ghalfb.transpose(0, 2, 1))
             walkers.Gf = walkers.Ga + walkers.Gb
             logger.debug(self, f"walkers.Ga.shape = {walkers.Ga.shape}")
             logger.debug(self, f"walkers.Gb.shape = {walkers.Gb.shape}")
@@ -1610,7 +1703,8 @@ class PhaselessElecBoson(Phaseless):
         #
         # 3) boson propagator (including free and bilinear terms)
         #
-        logger.debug(self, f"Debug: bosonic WF before one propagation: {abs(backend.sum(walkers.boson_phiw, axis=0)) / walkers.nwalkers}")
+        if self.verbose >= logger.DEBUG:
+            logger.debug(self, f"Debug: bosonic WF before one propagation: {abs(backend.sum(walkers.boson_phiw, axis=0)) / walkers.nwalkers}")
 
         if not self.turnoff_bosons:
             t0 = time.time()
@@ -1660,8 +1754,9 @@ class PhaselessElecBoson(Phaseless):
         newovlp = trial.ovlp_with_walkers(walkers)
         if not self.turnoff_bosons:
             new_boson_ovlp = trial.boson_ovlp_with_walkers(walkers) # bosonic
-            logger.debug(self, f"Debug: norm of new overlap is {backend.linalg.norm(newovlp)}")
-            logger.debug(self, f"Debug: bosonic overlap is {backend.linalg.norm(new_boson_ovlp)}")
+            if self.verbose >= logger.DEBUG:
+                logger.debug(self, f"Debug: norm of new overlap is {backend.linalg.norm(newovlp)}")
+                logger.debug(self, f"Debug: bosonic overlap is {backend.linalg.norm(new_boson_ovlp)}")
             # logger.debug(self, f"Debug: bosonic overlap is {new_boson_ovlp}")
             newovlp *= new_boson_ovlp
 
@@ -1672,7 +1767,8 @@ class PhaselessElecBoson(Phaseless):
         t0 = time.time()
         self.update_weight(walkers, ovlp, newovlp, cfb, cmf, eshift)
         self.wt_weight += time.time() - t0
-        logger.debug(self, f"Debug: updated weight: {backend.linalg.norm(walkers.weights)}\n eshift = {eshift}")
+        if self.verbose >= logger.DEBUG:
+            logger.debug(self, f"Debug: updated weight: {backend.linalg.norm(walkers.weights)}\n eshift = {eshift}")
 
         assert not backend.isnan(backend.linalg.norm(walkers.weights)), "NaN detected in walkers.weights"
 
@@ -43,9 +43,11 @@ from abc import abstractmethod
 from pyscf import lo, scf, fci
 from pyscf import tools as pyscftools
 from pyscf.gto import mole
-import numpy as backend
+import numpy
+from openms.qmc._backend import backend, to_device
 import scipy
 import itertools
+import functools
 import logging
 import h5py
 import time
@@ -60,9 +62,9 @@ from openms.lib.logger import task_title
 from openms.lib.boson import Boson
 from openms.qmc.trial import make_trial, multiCI
 from openms.qmc.estimators import local_eng_elec_chol
-from openms.qmc.estimators import local_eng_elec_chol_new
+from openms.qmc.estimators import local_eng_elec_chol_new, rowwise_dot
 
-from openms.qmc.propagators import Phaseless, PhaselessElecBoson
+from openms.qmc.propagators import Phaseless, PhaselessElecBoson, get_array_module
 
 
 def qr_ortho(phiw):
@@ -79,13 +81,46 @@ def qr_ortho(phiw):
     return Qmat, log_det
 
 
+@functools.lru_cache(maxsize=None)
+def _get_qr_lapack(dtype, nrow, ncol):
+    r"""Return (geqrf, orgqr/ungqr, lwork) for [nrow, ncol] matrices of dtype
+
+    The workspace size is queried once per shape and reused by every QR.
+    """
+    from scipy.linalg import lapack
+
+    a = numpy.zeros((nrow, ncol), dtype=dtype)
+    name = "ungqr" if numpy.iscomplexobj(a) else "orgqr"
+    geqrf, orgqr = lapack.get_lapack_funcs(("geqrf", name), (a,))
+    lwork = geqrf(a, lwork=-1)[2][0].real
+    lwork = max(lwork, orgqr(a, numpy.zeros(ncol, dtype=dtype), lwork=-1)[1][0].real)
+    return geqrf, orgqr, int(lwork)
+
+
 def qr_ortho_batch(phiw):
     r"""
     phiw size is [nwalker, nao, nalpha/nbeta]
+
+    The QR of all walkers is a single stacked call, which runs as batched
+    geqrf on the GPU (cupy) or loops over walkers in C (numpy). For larger
+    walkers on the CPU, geqrf + orgqr are called directly with a workspace
+    queried once per shape, which is faster than the numpy wrapper.
     """
-    Qmat, Rmat = backend.linalg.qr(phiw)
-    Rdiag = backend.einsum("wii->wi", Rmat)
-    log_det = backend.einsum("wi->w", backend.log(abs(Rdiag)))
+    xp = get_array_module(phiw)
+    nwalkers, nao, nocc = phiw.shape
+    if xp is not numpy or nao * nocc < 256:
+        Qmat, Rmat = xp.linalg.qr(phiw)
+        Rdiag = xp.diagonal(Rmat, axis1=-2, axis2=-1)
+        log_det = xp.sum(xp.log(xp.abs(Rdiag)), axis=-1)
+        return Qmat, log_det
+
+    geqrf, orgqr, lwork = _get_qr_lapack(phiw.dtype, nao, nocc)
+    Qmat = numpy.empty_like(phiw)
+    log_det = numpy.empty(nwalkers)
+    for iw in range(nwalkers):
+        qr, tau = geqrf(phiw[iw], lwork=lwork)[:2]
+        log_det[iw] = numpy.sum(numpy.log(numpy.abs(qr.diagonal())))
+        Qmat[iw] = orgqr(qr, tau, lwork=lwork, overwrite_a=1)[0]
     return Qmat, log_det
 
 
@@ -121,8 +156,11 @@ def kernel(mc, propagator=None, trial=None):
 
     # start the propagation
     tt = 0.0
-    energy_list = []
-    time_list = []
+    # preallocated records of time and energy at every property_calc_freq steps
+    nrec = mc.nsteps // mc.property_calc_freq + 1
+    time_list = backend.empty(nrec)
+    energy_list = backend.empty(nrec, dtype=backend.complex128)
+    irec = 0
     wall_t0 = time.time()
     logstring = f"{'Step':^8}{'Etot':^16}{'Raw_Etot':^16}{'Norm':^14}{'E1':^16}{'E2':^16}"
     if isinstance(propagator, PhaselessElecBoson):
@@ -130,72 +168,94 @@ def kernel(mc, propagator=None, trial=None):
     logstring += "   Wall_time"
     logger.info(mc, logstring)
 
+    # bind the attributes used in every step to locals
+    dt = mc.dt
+    nuc_energy = mc.nuc_energy
+    print_freq = mc.print_freq
+    renorm_freq = mc.renorm_freq
+    pop_control_freq = mc.pop_control_freq
+    property_calc_freq = mc.property_calc_freq
+    orthogonalization = mc.orthogonalization
+    property_stack = mc.property_stack
+    propagate_walkers = propagator.propagate_walkers
+    local_energy = propagator.local_energy
+    weight_control = walkers.weight_control
+    # wall times are accumulated as integer nanoseconds, and the end stamp of
+    # one section is reused as the start of the next one
+    clock = time.perf_counter_ns
+    wt_ortho = wt_propagator = wt_weight_control = wt_observables = 0
+
     # while tt <= mc.total_time:
     for step in range(mc.nsteps):
-        t0 = time.time()
-        tt = mc.dt * step
-        dump_result = step % mc.print_freq == 0
-        logger.debug(
-            mc, f"\nDebug: -------------- qmc step {step} -----------------"
-        )
+        t0 = clock()
+        tt = dt * step
+        dump_result = step % print_freq == 0
+        logger.debug(mc, "\nDebug: -------------- qmc step %d -----------------", step)
 
         # step 0): periodic re-orthogonalization
         # (FIXME: whether put this at the begining or end, in principle, should not matter)
-        if (step + 1) % mc.renorm_freq == 0:
-            wall_t1 = time.time()
-            mc.orthogonalization()
-            logger.debug(mc, f"Debug: orthogonalise at step {step}")
-            mc.wt_ortho += time.time() - wall_t1
+        wall_t1 = t0
+        if (step + 1) % renorm_freq == 0:
+            orthogonalization()
+            logger.debug(mc, "Debug: orthogonalise at step %d", step)
+            wall_t1 = clock()
+            wt_ortho += wall_t1 - t0
 
         # step 1: propagate walkers
-        wall_t1 = time.time()
-        propagator.propagate_walkers(
+        # eshift is updated by property_stack, so it is read from mc every step
+        propagate_walkers(
             trial, walkers, ltensor, eshift=mc.eshift, verbose=int(dump_result)
         )
-        mc.wt_propagator += time.time() - wall_t1
+        wall_t2 = clock()
+        wt_propagator += wall_t2 - wall_t1
 
         # step 2) weight control
-        wall_t1 = time.time()
-        mc.walkers.weight_control(step, freq=mc.pop_control_freq)
-        mc.wt_weight_control += time.time() - wall_t1
+        weight_control(step, freq=pop_control_freq)
+        wall_t1 = clock()
+        wt_weight_control += wall_t1 - wall_t2
 
         # step 3): estimate energies and other properties if needed
         # We store weights, energies, and other properties of each estimator in local
         # buffer_variables and compute the properties at every print_freq
-        wall_t1 = time.time()
-        mc.property_stack(walkers, step)
+        property_stack(walkers, step)
 
         # mc.measurements(walkers, step)
-        if (step + 1) % mc.property_calc_freq == 0:
+        if (step + 1) % property_calc_freq == 0:
             # Compute energies and other observables
-            energies = propagator.local_energy(h1e, ltensor, walkers, trial, enuc=mc.nuc_energy)
+            energies = local_energy(h1e, ltensor, walkers, trial, enuc=nuc_energy)
             energy = energies[0] / energies[1]
 
-            # Append time and energy to respective lists
-            time_list.append(tt)
-            energy_list.append(energy)
+            # Record time and energy
+            time_list[irec] = tt
+            energy_list[irec] = energy
+            irec += 1
 
-            # Log the computed energy and other properties
-            logstring = (
-                f"Step: {step:5d}  {energy:14.7e}  "
-                f"{energies[0]:14.7e}  {energies[1]:9.5e}  "
-                f"{backend.sum(walkers.weights_org):14.7e}  "
-                f"{energies[2]:14.7e}  {energies[3]:14.7e}  "
-            )
-            if len(energies) > 4:
-                logstring += f"{energies[4]:14.7e}  {energies[5]:14.7e}  "
-            logstring += f"{time.time() - t0:10.4f}s"
+            # Log the computed energy and other properties (skip the formatting
+            # entirely when the message would be discarded)
+            if mc.verbose >= logger.INFO:
+                logstring = (
+                    f"Step: {step:5d}  {energy:14.7e}  "
+                    f"{energies[0]:14.7e}  {energies[1]:9.5e}  "
+                    f"{walkers.weights_org_sum:14.7e}  "
+                    f"{energies[2]:14.7e}  {energies[3]:14.7e}  "
+                )
+                if len(energies) > 4:
+                    logstring += f"{energies[4]:14.7e}  {energies[5]:14.7e}  "
+                logstring += f"{(clock() - t0) * 1e-9:10.4f}s"
 
-            logger.info(mc, logstring)
-            sys.stdout.flush()
-        mc.wt_observables += time.time() - wall_t1
+                logger.info(mc, logstring)
+                sys.stdout.flush()
+        wt_observables += clock() - wall_t1
 
-        # step 5): TODO: code of checkpoint
-        wall_t1 = time.time()
+        # step 5): TODO: code of checkpoint (time it into mc.wt_io)
         # if dump_result:
         #     mc.save_checkpoint()
         #     logger.debug(mc, f"local_energy:   {walkers.eloc}")
-        mc.wt_io += time.time() - wall_t1
+
+    mc.wt_ortho += wt_ortho * 1e-9
+    mc.wt_propagator += wt_propagator * 1e-9
+    mc.wt_weight_control += wt_weight_control * 1e-9
+    mc.wt_observables += wt_observables * 1e-9
 
     #
     # TODO: code of analysis, post processing, etc.
@@ -204,7 +264,7 @@ def kernel(mc, propagator=None, trial=None):
 
     # finalize the propagations
     mc.post_kernel()
-    return time_list, energy_list
+    return time_list[:irec], energy_list[:irec]
 
 
 class QMCbase(object):
@@ -274,6 +334,19 @@ class QMCbase(object):
         # turn on the block_decompose_eri anyway!
         self.block_decompose_eri = kwargs.get("block_decompose_eri", False)
         self.chol_thresh = kwargs.get("chol_thresh", 1.0e-6)
+        # decomposition of the full ERI: "svd" or "cd" (pivoted Cholesky, which
+        # avoids the O(N^3) SVD of the (nao^2, nao^2) ERI matrix); note that
+        # chol_thresh bounds the residual diagonal for "cd", see tools.chols_full
+        self.chol_method = kwargs.get("chol_method", "svd")
+        # build the HS operator of each step from a single-precision copy of the
+        # Cholesky tensor to halve its memory traffic; the propagator build, the
+        # half-rotated integrals (force bias and energies), h1e and walkers all
+        # use the double-precision ltensor
+        self.mixed_precision = kwargs.get("mixed_precision", False)
+        # "memory" keeps ltensor in RAM, "h5" moves it to a temporary HDF5 file
+        # once the trial and propagator are built, and the HS operator of each
+        # step streams the chols from it (electronic Phaseless propagator only)
+        self.ltensor_backend = kwargs.get("ltensor_backend", "memory")
 
         # check whether it is a eb-AFQMC case
         # Two ways of turning on fermion-boson interactions
@@ -377,6 +450,23 @@ class QMCbase(object):
         self.property_buffer = backend.zeros(
             (len(self.stacked_variables),), dtype=backend.complex128
         )
+        # per-step values are written into one row of this ring buffer (at fixed
+        # indices) and the rows are summed into property_buffer at reduction time
+        self._prop_ring = backend.zeros(
+            (self.property_calc_freq, len(self.stacked_variables)),
+            dtype=backend.complex128,
+        )
+        index = self.stacked_variables.index
+        self._idx_w = index("weights")
+        self._idx_uw = index("unscaled_weights")
+        self._idx_eh = index("walker_hybrid_energies")
+        self._idx_el = index("walker_local_energies")
+        self._energy_idx = backend.array(
+            [i for i, name in enumerate(self.stacked_variables) if "energies" in name]
+        )
+        self._weight_idx = backend.array(
+            [i for i, name in enumerate(self.stacked_variables) if "weights" in name]
+        )
         self.eshift = 0.0
 
         # set up calculations
@@ -441,6 +531,11 @@ class QMCbase(object):
         t0 = time.time()
         logger.note(self, task_title("Get integrals"))
         self.h1e, self.ltensor = self.get_integrals()
+        # no-op for numpy, moves the integrals to the GPU for the cupy backend.
+        # h1e and ltensor are constant during the propagation and are kept
+        # C-contiguous, so that flattening them for GEMMs never copies
+        self.h1e = backend.ascontiguousarray(to_device(self.h1e))
+        self.ltensor = backend.ascontiguousarray(to_device(self.ltensor))
 
         # half-rotate integrals
         self.trial.half_rotate_integrals(self.h1e, self.ltensor)
@@ -449,7 +544,7 @@ class QMCbase(object):
             task_title(f"Get integrals ... Done! Time used: {time.time()-t0: 7.3f} s"),
         )
         if self.geb is not None and not self.propagator_options["turnoff_bosons"]:
-            zalpha = backend.einsum("Xpq, pq->X", self.geb, self.trial.Gf[0])
+            zalpha = backend.tensordot(self.geb, self.trial.Gf[0], axes=2)
             self.trial.initialize_boson_trial_with_z(zalpha, self.mol.nboson_states)
             logger.debug(self, f"Debug: initial coherent state is  : {zalpha}")
             logger.debug(self, f"Debug: initial bosonic trial WF is: {self.trial.boson_psi}")
@@ -519,6 +614,9 @@ class QMCbase(object):
         logger.note(self, f" Energy scheme          : {self.energy_scheme}")
         logger.note(self, f" Number of chols        : {self.ltensor.shape[0]:5d}")
         logger.note(self, f" Threshold of chols     : {self.chol_thresh:7.3e}")
+        logger.note(self, f" Decomposition of chols : {self.chol_method}")
+        logger.note(self, f" Mixed precision chols  : {self.mixed_precision}")
+        logger.note(self, f" Storage of chols       : {self.ltensor_backend}")
         logger.note(self, f" Use Spin orbital?      : {self.use_so}")
         logger.note(self, f" Unrestricted spin?     : {self.uhf}")
         logger.note(self, f" No. of spin components : {self.ncomponents:5d}")
@@ -572,9 +670,7 @@ class QMCbase(object):
             nmodes = g_AO.shape[0]
 
             # transform into OAO
-            g_OR = backend.einsum(
-                "ik, mkj, jl -> mil", Xmat.conj().T, g_AO, Xmat, optimize=True
-            )
+            g_OR = backend.matmul(Xmat.conj().T, backend.matmul(g_AO, Xmat))
 
         mol = self.mol._mol if isinstance(self.mol, Boson) else self.mol
 
@@ -583,6 +679,7 @@ class QMCbase(object):
             mol, Xmat=Xmat, thresh=self.chol_thresh,
             g=g_AO,
             block_decompose_eri=self.block_decompose_eri,
+            chol_method=self.chol_method,
         )
         #print("Norm of ltensor is: ", backend.linalg.norm(ltensor))
 
@@ -600,7 +697,7 @@ class QMCbase(object):
 
         if self.fbinteraction: # isinstance(self.system, Boson):
             # add DSE contribution to h1e
-            oei_dse = 0.5 * backend.einsum('Xpq, Xqs->ps', g_OR, g_OR)
+            oei_dse = 0.5 * backend.tensordot(g_OR, g_OR, axes=([0, 2], [0, 1]))
             h1e += backend.array([oei_dse for _ in range(self.ncomponents)])
 
             # geb is the bilinear coupling term
@@ -610,7 +707,7 @@ class QMCbase(object):
             # add terms due to decoupling of bilinear term
             if self.propagator_options["decouple_bilinear"]:
                 logger.debug(self, f"creating chol due to decomposition of bilinear term")
-                zalpha = backend.einsum("Xpq, pq->X", self.geb, self.trial.Gf[0])
+                zalpha = backend.tensordot(self.geb, self.trial.Gf[0], axes=2)
 
                 # TODO: set Afac as input variables as long as
                 # rewrite \sqrt{w/2} (\lambda\cdot D}(a^\dagger_v + a_v)
@@ -632,9 +729,10 @@ class QMCbase(object):
                 logger.debug(self, f"Debug: Decouple scheme = {decouple_scheme}")
                 logger.debug(self, f"Debug: Decomposing bilinear results in {len(self.chol_bilinear[0])} AFs")
 
-            for i in range(ltensor.shape[0]):
-                evals, evecs = scipy.linalg.eigh(ltensor[i])
-                logger.debug(self, f"evals of ltensor[{i}] in OAO: {evals}")
+            if self.verbose >= logger.DEBUG:
+                evals = backend.linalg.eigvalsh(ltensor)
+                for i in range(ltensor.shape[0]):
+                    logger.debug(self, f"evals of ltensor[{i}] in OAO: {evals[i]}")
 
             logger.debug(self, f"Norm of ltensor (with chol_bilinear_e):  {backend.linalg.norm(ltensor)}")
 
@@ -642,6 +740,43 @@ class QMCbase(object):
         return h1e, ltensor
 
 
+    def dump_ltensor_h5(self, ltensor, name="ltensor"):
+        r"""Move ltensor into a temporary HDF5 file, chunked by field
+
+        Returns the h5py dataset ``name`` that replaces the in-memory ltensor
+        (an existing dataset of that name is reused). The file is removed when
+        the QMC object is released.
+        """
+        from pyscf import lib
+
+        if isinstance(ltensor, h5py.Dataset):
+            return ltensor
+        if getattr(self, "_ltensor_h5", None) is None:
+            self._ltensor_h5 = lib.H5TmpFile()
+        if name in self._ltensor_h5:
+            return self._ltensor_h5[name]
+        norb = ltensor.shape[-1]
+        dset = self._ltensor_h5.create_dataset(
+            name, data=ltensor, chunks=(1, norb, norb)
+        )
+        logger.info(self, f"{name} is stored in {self._ltensor_h5.filename}")
+        return dset
+
+    def hs_ltensor(self, ltensor):
+        r"""Return the copy of ltensor used by the HS operator of each step
+
+        With mixed_precision, this is a float32/complex64 copy, otherwise
+        ltensor itself.
+        """
+        if not self.mixed_precision:
+            return ltensor
+        single = backend.complex64 if backend.iscomplexobj(ltensor) else backend.float32
+        return ltensor.astype(single)
+
+    def ltensor_slice(self, sl):
+        r"""Return ``ltensor[sl]`` as an array, wherever ltensor is stored"""
+        return backend.asarray(self.ltensor[sl])
+
     def measure_observables(self, operator):
         r"""Placeholder for measure_observables.
         According to the operator, we measure the expectation values
@@ -690,38 +825,22 @@ class QMCbase(object):
             this function into walkers. Hence, the function here is to be deprecated!
         """
 
-        # 1) old code
-        # ortho_walkers = backend.zeros_like(self.walkers.phiwa)
-        detR = backend.zeros(self.walkers.nwalkers, dtype=backend.complex128)
-        for iw in range(self.walkers.phiwa.shape[0]):
-            self.walkers.phiwa[iw], log_det = qr_ortho(self.walkers.phiwa[iw])
-
-            if self.walkers.ncomponents > 1:
-                self.walkers.phiwb[iw], log_det_b = qr_ortho(self.walkers.phiwb[iw])
-                log_det += log_det_b
-
-            detR[iw] = backend.exp(log_det - self.walkers.detR_shift[iw])
-            self.walkers.log_detR[iw] += backend.log(detR[iw])
-            self.walkers.detR[iw] = detR[iw]
-            self.walkers.ovlp[iw] = self.walkers.ovlp[iw] / detR[iw]
-
-        """
-        # 2) batched code
-        self.walkers.phiwa, log_det = qr_ortho_batch(self.walkers.phiwa)
+        # batched QR of all walkers; phiwa/phiwb may be views of phiw, so
+        # they are overwritten in place
+        self.walkers.phiwa[...], log_det = qr_ortho_batch(self.walkers.phiwa)
         if self.walkers.ncomponents > 1:
-            self.walkers.phiwb, log_det_b = qr_ortho_batch(self.walkers.phiwb)
+            self.walkers.phiwb[...], log_det_b = qr_ortho_batch(self.walkers.phiwb)
             log_det += log_det_b
 
-        self.walkers.detR = backend.exp(log_det - self.walkers.detR_shift)
-        self.walkers.ovlp = self.walkers.ovlp / self.walkers.detR
-        """
+        detR = backend.exp(log_det - self.walkers.detR_shift)
+        self.walkers.log_detR += backend.log(detR)
+        self.walkers.detR[:] = detR
+        self.walkers.ovlp /= detR
 
 
         if self.walkers.boson_phiw is not None:
-            ortho_walkers = backend.zeros_like(self.walkers.boson_phiw)
-            norms = backend.einsum('ij,ij->i', self.walkers.boson_phiw, self.walkers.boson_phiw.conj())
-            norms = backend.sqrt(norms)
-            self.walkers.boson_phiw = backend.abs(self.walkers.boson_phiw / norms[:, None])
+            norms = backend.linalg.norm(self.walkers.boson_phiw, axis=1, keepdims=True)
+            self.walkers.boson_phiw = backend.abs(self.walkers.boson_phiw / norms)
             # for iw in range(self.walkers.boson_phiw.shape[0]):
             #    ortho_walkers[iw] = backend.linalg.qr(self.walkers.boson_phiw[iw])[0]
             # self.walkers.boson_phiw = ortho_walkers
@@ -738,15 +857,21 @@ class QMCbase(object):
                  + \frac{1}{2}\sum_{pqrs\sigma\sigma'} I_{prqs} G_{pr\sigma} G_{qs\sigma'}
                  - \frac{1}{2}\sum_{pqrs\sigma} I_{pqrs} G_{ps\sigma} G_{qr\sigma}
         """
-        # E_coul
-        tmp = 2.0 * backend.einsum("prqs,zSpr->zqs", eri, G1p) * self.spin_fac
-        ecoul = backend.einsum("zqs,zSqs->z", tmp, G1p)
-        # E_xx
-        tmp = backend.einsum("prqs,zSps->zSqr", eri, G1p)
-        exx = backend.einsum("zSqs,zSqs->z", tmp, G1p)
+        # both ERI contractions are single GEMMs over the flattened pair indices
+        nwalkers = G1p.shape[0]
+        npair = eri.shape[0] * eri.shape[1]
+        Gflat = G1p.reshape(-1, npair)
+
+        # E_coul: (pr) x (qs) view of eri
+        Gsum = G1p.sum(axis=1).reshape(nwalkers, npair)
+        tmp = 2.0 * backend.dot(Gsum, eri.reshape(npair, npair)) * self.spin_fac
+        ecoul = rowwise_dot(tmp, Gsum)
+        # E_xx: (ps) x (qr) view of eri
+        tmp = backend.dot(Gflat, eri.transpose(0, 3, 2, 1).reshape(npair, npair))
+        exx = rowwise_dot(tmp.reshape(nwalkers, -1), Gflat.reshape(nwalkers, -1))
         e2 = (ecoul - exx) * self.spin_fac
 
-        e1 = 2.0 * backend.einsum("zSpq,pq->z", G1p, h1e) * self.spin_fac
+        e1 = 2.0 * backend.dot(Gsum, h1e.ravel()) * self.spin_fac
 
         energy = e1 + e2 + self.nuc_energy
         return energy
@@ -791,9 +916,8 @@ class QMCbase(object):
             stacklevel=2,
         )
         # approach 0) : most efficient way to compute the energy: use Ltensors instead of eri
-        vbias2 = vbias * vbias
-        ej = 2.0 * backend.einsum("zn->z", vbias2)
-        ek = backend.einsum("znpr, znrp->z", TL_theta, TL_theta)
+        ej = 2.0 * rowwise_dot(vbias, vbias)
+        ek = (TL_theta * TL_theta.transpose(0, 1, 3, 2)).sum(axis=(1, 2, 3))
         e2 = ej - ek
 
         # approach 1) : most inefficient way
@@ -830,49 +954,34 @@ class QMCbase(object):
             # TODO: compute the initial values of the properties
             return
 
-        # Dictionary linking property names to their computed values
-        _data_dict = {
-            "weights": backend.sum(walkers.weights),
-            "unscaled_weights": backend.sum(walkers.weights_org),
-            "walker_hybrid_energies": backend.sum(walkers.ehybrid * walkers.weights),
-            "walker_local_energies": backend.sum(walkers.eloc * walkers.weights),
-        }
-
         # Accumulate values for the specified properties
-        tmp = [
-            _data_dict.get(key, 0.0 + 0.0j) for key in self.stacked_variables
-        ]
-        self.property_buffer += backend.array(tmp)
+        scratch = self._prop_ring[step % self.property_calc_freq]
+        scratch[self._idx_w] = backend.sum(walkers.weights)
+        scratch[self._idx_uw] = walkers.weights_org_sum
+        scratch[self._idx_eh] = backend.dot(walkers.ehybrid, walkers.weights)
+        scratch[self._idx_el] = backend.dot(walkers.eloc, walkers.weights)
 
         # logger.debug(self, f"Debug: updated buffer shape is {self.property_buffer.shape}")
         # logger.debug(self, f"Debug: updated buffer is {self.property_buffer}")
 
         # Perform periodic property reduction and normalization
         if (step + 1) % self.property_calc_freq == 0:
+            # every row of the ring has been overwritten within this window
+            backend.sum(self._prop_ring, axis=0, out=self.property_buffer)
 
             # Normalize energies by weights
-            weights_idx = self.stacked_variables.index("weights")
-            norm = self.property_buffer[weights_idx]
-
-            for idx, name in enumerate(self.stacked_variables):
-                if "energies" in name:
-                    self.property_buffer[idx] /= norm
+            norm = self.property_buffer[self._idx_w]
+            self.property_buffer[self._energy_idx] /= norm
 
-            # Note: dont' combine the following loop with above one, for energies,
+            # Note: dont' combine the following with above one, for energies,
             # we only need to normalized it against weights
             # Normalize weights over the calculation frequency
-            for idx, name in enumerate(self.stacked_variables):
-                if "weights" in name:
-                    self.property_buffer[idx] /= self.property_calc_freq
+            self.property_buffer[self._weight_idx] /= self.property_calc_freq
 
             # Update the energy shift using normalized hybrid energies
-            idx = self.stacked_variables.index("walker_hybrid_energies")
-            self.eshift = self.property_buffer[idx]
+            self.eshift = self.property_buffer[self._idx_eh]
             logger.debug(self, f"Debug: update eshift = {self.eshift}")
 
-            # Reset the property buffer for the next accumulation cycle
-            self.property_buffer.fill(0.0 + 0.0j)
-
 
     def kernel(self, propagator=None, trial_wf=None):
         r"""main function for QMC time-stepping
@@ -904,7 +1013,6 @@ class QMCbase(object):
 
         h1e = self.h1e
         # eri = self.eri
-        ltensor = self.ltensor
         #propagator = self.propagator
 
         trial = self.trial if trial_wf is None else trial_wf
@@ -912,8 +1020,16 @@ class QMCbase(object):
             propagator = self.propagator
         walkers = self.walkers
 
-        # setup propagator
+        # setup propagator (always from the double-precision ltensor)
+        ltensor = self.ltensor_slice(slice(None))
         propagator.build(h1e, ltensor, trial, self.geb)
+        ltensor = self.hs_ltensor(ltensor)
+        if self.ltensor_backend == "h5" and not self.fbinteraction:
+            self.ltensor = self.dump_ltensor_h5(self.ltensor)
+            if self.mixed_precision:
+                ltensor = self.dump_ltensor_h5(ltensor, name="ltensor_hs")
+            else:
+                ltensor = self.ltensor
 
         logger.debug(self, f"Debug: the initial orthogonalise in walker")
         self.orthogonalization()
@@ -923,8 +1039,11 @@ class QMCbase(object):
 
         # start the propagation
         tt = 0.0
-        energy_list = []
-        time_list = []
+        # preallocated records of time and energy at every property_calc_freq steps
+        nrec = self.nsteps // self.property_calc_freq + 1
+        time_list = backend.empty(nrec)
+        energy_list = backend.empty(nrec, dtype=backend.complex128)
+        irec = 0
         wall_t0 = time.time()
         logstring = f"{'Step':^10}{'Etot':^16}{'Raw_Etot':^17}{'Hybrid_Energy':^17}{'Norm':^11}{'Raw_Norm':^11}{'E1':^15}{'E2':^15}"
         if isinstance(propagator, PhaselessElecBoson):
@@ -932,22 +1051,39 @@ class QMCbase(object):
         logstring += "  Wall_time"
         logger.info(self, logstring)
 
+        # bind the attributes used in every step to locals
+        dt = self.dt
+        nuc_energy = self.nuc_energy
+        print_freq = self.print_freq
+        renorm_freq = self.renorm_freq
+        pop_control_freq = self.pop_control_freq
+        pop_control_method = self.pop_control_method
+        property_calc_freq = self.property_calc_freq
+        orthogonalization = self.orthogonalization
+        property_stack = self.property_stack
+        propagate_walkers = propagator.propagate_walkers
+        local_energy = propagator.local_energy
+        weight_control = walkers.weight_control
+        # wall times are accumulated as integer nanoseconds, and the end stamp of
+        # one section is reused as the start of the next one
+        clock = time.perf_counter_ns
+        wt_ortho = wt_propagator = wt_weight_control = wt_observables = 0
+
         # while tt <= self.total_time:
         for step in range(self.nsteps):
-            t0 = time.time()
-            tt = self.dt * step
-            dump_result = step % self.print_freq == 0
-            logger.debug(
-                self, f"\nDebug: -------------- qmc step {step} -----------------"
-            )
+            t0 = clock()
+            tt = dt * step
+            dump_result = step % print_freq == 0
+            logger.debug(self, "\nDebug: -------------- qmc step %d -----------------", step)
 
             # step 3): periodic re-orthogonalization
             # (FIXME: whether put this at the begining or end, in principle, should not matter)
-            if (step + 1) % self.renorm_freq == 0:
-                wall_t1 = time.time()
-                self.orthogonalization()
-                logger.debug(self, f"Debug: orthogonalise at step {step}")
-                self.wt_ortho += time.time() - wall_t1
+            wall_t1 = t0
+            if (step + 1) % renorm_freq == 0:
+                orthogonalization()
+                logger.debug(self, "Debug: orthogonalise at step %d", step)
+                wall_t1 = clock()
+                wt_ortho += wall_t1 - t0
 
             vbias = None
             # step 1): get force bias (note: TL_tensor and mf_shift moved into propagator.atrributes)
@@ -966,17 +1102,18 @@ class QMCbase(object):
             xbar = -backend.sqrt(self.dt) * (1j * 2 * vbias - propagator.mf_shift)
             """
 
-            wall_t1 = time.time()
             # step 3): propagate walkers and update weights
-            propagator.propagate_walkers(
+            # (eshift is updated by property_stack, so it is read from self every step)
+            propagate_walkers(
                 trial, walkers, ltensor, eshift=self.eshift, verbose=int(dump_result)
             )
-            self.wt_propagator += time.time() - wall_t1
+            wall_t2 = clock()
+            wt_propagator += wall_t2 - wall_t1
 
             # step 2) weight control
-            wall_t1 = time.time()
-            self.walkers.weight_control(step, freq=self.pop_control_freq, method=self.pop_control_method)
-            self.wt_weight_control += time.time() - wall_t1
+            weight_control(step, freq=pop_control_freq, method=pop_control_method)
+            wall_t1 = clock()
+            wt_weight_control += wall_t1 - wall_t2
 
             # moved phaseless approximation to propagation
             # since it is associated with propagation type
@@ -985,41 +1122,46 @@ class QMCbase(object):
             # step 4): estimate energies and other properties if needed
             # We store weights, energies, and other properties of each estimator in local
             # buffer_variables and compute the properties at every print_freq
-            wall_t1 = time.time()
-            self.property_stack(walkers, step)
+            property_stack(walkers, step)
 
             # self.measurements(walkers, step)
-            if (step + 1) % self.property_calc_freq == 0:
+            if (step + 1) % property_calc_freq == 0:
                 # Compute energies and other observables
-                energies = propagator.local_energy(h1e, ltensor, walkers, trial, enuc=self.nuc_energy)
+                energies = local_energy(h1e, ltensor, walkers, trial, enuc=nuc_energy)
                 energy = energies[0] / energies[1]
 
-                # Append time and energy to respective lists
-                time_list.append(tt)
-                energy_list.append(energy)
-
-                # Log the computed energy and other properties
-                logstring = (
-                    f"Step {step:5d}  {energy:14.7e}  "
-                    f"{energies[0]:14.7e}  "
-                    f"{self.eshift.real:14.7e}  {energies[1]:8.4e}  "
-                    f"{walkers.raw_norm:9.4e}  "
-                    f"{energies[2]:14.7e}  {energies[3]:14.7e}  "
-                )
-                if len(energies) > 4:
-                    logstring += f"{energies[4]:14.7e}  {energies[5]:14.7e}  "
-                logstring += f"{time.time() - t0:9.4f}s"
-
-                logger.info(self, logstring)
-                sys.stdout.flush()
-            self.wt_observables += time.time() - wall_t1
-
-            # step 5): TODO: code of checkpoint
-            wall_t1 = time.time()
+                # Record time and energy
+                time_list[irec] = tt
+                energy_list[irec] = energy
+                irec += 1
+
+                # Log the computed energy and other properties (skip the formatting
+                # entirely when the message would be discarded)
+                if self.verbose >= logger.INFO:
+                    logstring = (
+                        f"Step {step:5d}  {energy:14.7e}  "
+                        f"{energies[0]:14.7e}  "
+                        f"{self.eshift.real:14.7e}  {energies[1]:8.4e}  "
+                        f"{walkers.raw_norm:9.4e}  "
+                        f"{energies[2]:14.7e}  {energies[3]:14.7e}  "
+                    )
+                    if len(energies) > 4:
+                        logstring += f"{energies[4]:14.7e}  {energies[5]:14.7e}  "
+                    logstring += f"{(clock() - t0) * 1e-9:9.4f}s"
+
+                    logger.info(self, logstring)
+                    sys.stdout.flush()
+            wt_observables += clock() - wall_t1
+
+            # step 5): TODO: code of checkpoint (time it into self.wt_io)
             # if dump_result:
             #     self.save_checkpoint()
             #     logger.debug(self, f"local_energy:   {walkers.eloc}")
-            self.wt_io += time.time() - wall_t1
+
+        self.wt_ortho += wt_ortho * 1e-9
+        self.wt_propagator += wt_propagator * 1e-9
+        self.wt_weight_control += wt_weight_control * 1e-9
+        self.wt_observables += wt_observables * 1e-9
 
         #
         # TODO: code of analysis, post processing, etc.
@@ -1028,7 +1170,7 @@ class QMCbase(object):
 
         # finalize the propagations
         self.post_kernel()
-        return time_list, energy_list
+        return time_list[:irec], energy_list[:irec]
 
     def _finalize(self):
         """Hook for dumping results and clearing up the object."""
@@ -71,6 +71,10 @@ def bilinear_decomposition(Afac, Bfac, chol_eb, decouple_scheme):
 
     thresh = 1.e-10
     Lga = chol_eb * Afac[:, backend.newaxis, backend.newaxis]
+    # modes with vanishing coupling add no AFs (their slots stay zero)
+    mask = backend.linalg.norm(Lga, axis=(1, 2)) > thresh
+    Lga = Lga * mask[:, backend.newaxis, backend.newaxis]
+    Bfac = Bfac * mask
 
     if decouple_scheme == 1:
         # Add the chols due to the decomposition of bilinear term:
@@ -91,46 +95,37 @@ def bilinear_decomposition(Afac, Bfac, chol_eb, decouple_scheme):
         # factors = [-1j*Afac, Afac]
         chol_bilinear_e = backend.zeros((3*nmodes, nao, nao), dtype=complex)
         chol_bilinear_b = backend.zeros(3*nmodes, dtype=complex)
-        for imode in range(nmodes):
-            if backend.linalg.norm(Lga[imode]) > 1.0e-10:
-                # term 1: A_\alpha \hat{F}_\alpha + B_\alpha \hat{B}_\alpha
-                # these operator corresponds to the same AF and same random number
-                chol_bilinear_e[imode*3] = Lga[imode]
-                chol_bilinear_b[imode*3] = Bfac[imode]
+        # term 1: A_\alpha \hat{F}_\alpha + B_\alpha \hat{B}_\alpha
+        # these operator corresponds to the same AF and same random number
+        chol_bilinear_e[0::3] = Lga
+        chol_bilinear_b[0::3] = Bfac
 
-                # term 2: i A_\alpha \hat{F}_\alpha
-                chol_bilinear_e[imode*3 + 1] = 1j* Lga[imode]
+        # term 2: i A_\alpha \hat{F}_\alpha
+        chol_bilinear_e[1::3] = 1j * Lga
 
-                # term 3: i B_\alpha \hat{B}_\alpha
-                chol_bilinear_b[imode*3 + 2] = 1j * Bfac[imode]
+        # term 3: i B_\alpha \hat{B}_\alpha
+        chol_bilinear_b[2::3] = 1j * Bfac
 
     elif decouple_scheme == 2:
         chol_bilinear_e = backend.zeros((2*nmodes, nao, nao), dtype=complex)
         chol_bilinear_b = backend.zeros(2*nmodes, dtype=complex)
-        for imode in range(nmodes):
-            if backend.linalg.norm(Lga[imode]) > 1.0e-10:
-                # term 1: \frac{1}{\sqrt{2}} (A_\alpha \hat{F}_\alpha + B_\alpha \hat{B}_\alpha)
-                # these operator corresponds to the same AF and same random number
-                fac = 1.0 / numpy.sqrt(2.0)
-                chol_bilinear_e[imode*2] = Lga[imode] * fac
-                chol_bilinear_b[imode*2] = Bfac[imode] * fac
-
-                # term 2: \frac{i}{\sqrt{2}} (A_\alpha \hat{F}_\alpha - B_\alpha \hat{B}_\alpha)
-                # these operator corresponds to the same AF and same random number
-                fac = 1j / numpy.sqrt(2.0)
-                ltensor = [fac * Lga[imode] , -fac * Bfac[imode]]
-                chol_bilinear_e[imode*2+1] = Lga[imode] * fac
-                chol_bilinear_b[imode*2+1] = - fac * Bfac[imode]
+        # term 1: \frac{1}{\sqrt{2}} (A_\alpha \hat{F}_\alpha + B_\alpha \hat{B}_\alpha)
+        # these operator corresponds to the same AF and same random number
+        fac = 1.0 / numpy.sqrt(2.0)
+        chol_bilinear_e[0::2] = Lga * fac
+        chol_bilinear_b[0::2] = Bfac * fac
+
+        # term 2: \frac{i}{\sqrt{2}} (A_\alpha \hat{F}_\alpha - B_\alpha \hat{B}_\alpha)
+        # these operator corresponds to the same AF and same random number
+        fac = 1j / numpy.sqrt(2.0)
+        chol_bilinear_e[1::2] = Lga * fac
+        chol_bilinear_b[1::2] = - fac * Bfac
     else:
         # YZ: This is wrong, DON'T USE IT!!!
-        chol_bilinear_e = backend.zeros((nmodes, nao, nao), dtype=complex)
-        chol_bilinear_b = backend.zeros(nmodes, dtype=complex)
-        for imode in range(nmodes):
-            if backend.linalg.norm(Lga[imode]) > 1.0e-10:
-                # term 1: A_\alpha \hat{F}_\alpha + B_\alpha \hat{B}_\alpha
-                # these operator corresponds to the same AF and same random number
-                chol_bilinear_e[imode] = Lga[imode]
-                chol_bilinear_b[imode] = Bfac[imode]
+        # term 1: A_\alpha \hat{F}_\alpha + B_\alpha \hat{B}_\alpha
+        # these operator corresponds to the same AF and same random number
+        chol_bilinear_e = Lga.astype(complex)
+        chol_bilinear_b = Bfac.astype(complex)
 
     return [chol_bilinear_e, chol_bilinear_b]
 
@@ -167,7 +162,7 @@ def read_fcidump(fname, norb):
 
 
 
-def get_h1e_chols(mol, Xmat=None, thresh=1.e-6, g=None, block_decompose_eri=False):
+def get_h1e_chols(mol, Xmat=None, thresh=1.e-6, g=None, block_decompose_eri=False, chol_method="svd"):
     r"""
     Calculate the one-electron Hamiltonian (h1e) in the orthogonal atomic orbital (OAO) basis
     and the Cholesky decomposition tensor for a molecular system.
@@ -183,6 +178,9 @@ def get_h1e_chols(mol, Xmat=None, thresh=1.e-6, g=None, block_decompose_eri=Fals
         a matrix use to rotate the h1e and eri (or chols)
     thresh : float, optional
         Threshold for truncation in the Cholesky decomposition. Defaults to 1.e-6.
+    chol_method : str, optional
+        Decomposition of the full ERI, "svd" or "cd", see :func:`chols_full`.
+        Not used with ``block_decompose_eri``. Defaults to "svd".
 
     Returns
     -------
@@ -212,20 +210,25 @@ def get_h1e_chols(mol, Xmat=None, thresh=1.e-6, g=None, block_decompose_eri=Fals
         # get chols from sub block
         ltensors = chols_blocked(mol, thresh=thresh, max_chol_fac=15, g=g)
     else:
-        ltensors = chols_full(mol, thresh=thresh, g=g)
+        ltensors = chols_full(mol, thresh=thresh, g=g, method=chol_method)
 
     if mol.verbose > 3:
         print(f"Debug: norm of ltensor in AO = {numpy.linalg.norm(ltensors)}")
-    # transfer ltensor into OAO
-    for i, chol in enumerate(ltensors):
-        ltensors[i] = reduce(numpy.dot, (Xmat.conj().T, chol, Xmat))
+    # transfer ltensor into OAO, X^H L_n X of all n as two batched GEMMs,
+    # written back into ltensors when the dtype allows it
+    tmp = numpy.matmul(ltensors, Xmat)
+    if tmp.dtype == ltensors.dtype:
+        numpy.matmul(Xmat.conj().T, tmp, out=ltensors)
+    else:
+        ltensors = numpy.matmul(Xmat.conj().T, tmp)
+    del tmp
 
     return h1e, ltensors, nuc
 
 
-def chols_full(mol, eri=None, thresh=1.e-12, aosym="s1", g=None):
+def chols_full(mol, eri=None, thresh=1.e-12, aosym="s1", g=None, method="svd"):
     r"""
-    Get Cholesky decomposition from the SVD of the full ERI.
+    Get Cholesky decomposition of the full ERI.
 
     Parameters
     ----------
@@ -237,6 +240,16 @@ def chols_full(mol, eri=None, thresh=1.e-12, aosym="s1", g=None):
         Threshold for truncation. Defaults to 1.e-12.
     aosym : str, optional
         Symmetry in the ERI tensor. Defaults to "s1".
+    method : str, optional
+        "svd" truncates the singular values of the ``(nao^2, nao^2)`` ERI
+        matrix, "cd" uses the pivoted (incomplete) Cholesky decomposition,
+        see :func:`pivoted_cholesky`. Defaults to "svd".
+
+        Note that ``thresh`` has a different meaning for the two methods: it
+        bounds the discarded singular values for "svd" and the largest residual
+        diagonal for "cd", so "cd" gives a looser factorization (fewer vectors,
+        larger ERI error) for the same ``thresh``. Use a smaller ``thresh`` with
+        "cd" for a comparable accuracy.
 
     Returns
     -------
@@ -253,19 +266,76 @@ def chols_full(mol, eri=None, thresh=1.e-12, aosym="s1", g=None):
         eri += numpy.einsum("npq, nrs->pqrs", g, g)
 
     eri = eri.reshape((nao**2, -1))
-    u, s, v = scipy.linalg.svd(eri)
-    del eri
-    # print("u.shape", u.shape)
-    # print("v.shape", v.shape)
-    # print("s.shape", s.shape)
-    # print(s>1.e-12)
-
-    idx = (s > thresh)
-    ltensor = (u[:,idx] * numpy.sqrt(s[idx])).T
+    if method == "cd":
+        ltensor = pivoted_cholesky(eri, thresh=thresh)
+        del eri
+    elif method == "svd":
+        u, s, v = scipy.linalg.svd(eri)
+        del eri
+
+        idx = (s > thresh)
+        ltensor = (u[:,idx] * numpy.sqrt(s[idx])).T
+    else:
+        raise ValueError(f"Unknown decomposition method {method} for the ERI")
     ltensor = ltensor.reshape(ltensor.shape[0], nao, nao)
 
     return ltensor
 
+
+def pivoted_cholesky(mat, thresh=1.e-12, max_rank=None):
+    r"""
+    Pivoted (incomplete) Cholesky decomposition of a positive semidefinite matrix,
+    :math:`M \approx \sum_x L_x L_x^T`.
+
+    At each step the largest residual diagonal element :math:`D_\nu` is chosen
+    as pivot and the new vector is :math:`L_x = (M_{:,\nu} - \sum_{y<x} L_y L_{y,\nu})
+    / \sqrt{D_\nu}`. The decomposition stops when :math:`\max D < thresh`, so
+    only ``rank`` columns of ``mat`` are used, i.e. :math:`O(rank^2 N)` instead of
+    the :math:`O(N^3)` of a full SVD, and the vectors take :math:`O(rank N)`
+    memory.
+
+    Parameters
+    ----------
+    mat : numpy.ndarray
+        Symmetric positive semidefinite matrix of shape (N, N).
+    thresh : float, optional
+        Threshold on the residual diagonal. Defaults to 1.e-12.
+    max_rank : int, optional
+        Maximum number of Cholesky vectors. Defaults to N.
+
+    Returns
+    -------
+    numpy.ndarray
+        Cholesky vectors with shape (rank, N).
+    """
+    n = mat.shape[0]
+    if max_rank is None:
+        max_rank = n
+    # the buffer of vectors is grown on demand, so that only O(rank N) memory is
+    # used instead of a dense (N, N) buffer
+    nbuf = min(max_rank, 10 * int(numpy.sqrt(n)) + 1)
+    ltensor = numpy.empty((nbuf, n), dtype=mat.dtype)
+    diag = mat.diagonal().real.copy()
+
+    nchol = 0
+    while nchol < max_rank:
+        nu = numpy.argmax(diag)
+        delta_max = diag[nu]
+        if delta_max < thresh:
+            break
+        if nchol == ltensor.shape[0]:
+            nbuf = min(max_rank, 2 * nchol)
+            buf = numpy.empty((nbuf, n), dtype=mat.dtype)
+            buf[:nchol] = ltensor
+            ltensor = buf
+        col = mat[:, nu] - numpy.dot(ltensor[:nchol, nu].conj(), ltensor[:nchol])
+        ltensor[nchol] = col / numpy.sqrt(delta_max)
+        diag -= (ltensor[nchol] * ltensor[nchol].conj()).real
+        nchol += 1
+
+    return ltensor[:nchol].copy()
+
+
 def chols_blocked(mol, thresh=1.e-6, max_chol_fac=15, g=None):
     r"""
     Get modified Cholesky decomposition from the block decomposition of ERI.
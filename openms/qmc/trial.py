@@ -140,7 +140,8 @@ from openms.lib.boson import Boson
 from openms.lib.logger import task_title
 from openms.lib.misc import deprecated
 from openms.mqed.qedhf import RHF as QEDRHF
-import numpy as backend
+from openms.qmc._backend import backend, to_device
+import numpy
 import h5py
 
 
@@ -243,7 +244,8 @@ def trial_walker_ovlp_base(phiw, psi):
     psi: ndarray
        trial wavefunction
     """
-    return backend.einsum("zpi, pj-> zij", phiw, psi.conj())
+    # S_{zij} = \sum_p phi_{zpi} psi^*_{pj} as a batched GEMM
+    return backend.matmul(phiw.transpose(0, 2, 1), psi.conj())
 
 
 def trial_walker_ovlp_gf_base(phiw, psi):
@@ -258,9 +260,11 @@ def trial_walker_ovlp_gf_base(phiw, psi):
     psi: ndarray
        trial wavefunction
     """
-    ovlp = backend.einsum("zpi, pj-> zij", phiw, psi.conj())
+    # batched GEMMs instead of einsum, which is parsed and
+    # dispatched to a non-BLAS loop on every call
+    ovlp = backend.matmul(phiw.transpose(0, 2, 1), psi.conj())
     inv_ovlp = backend.linalg.inv(ovlp)
-    Ghalf = backend.einsum("zij, zpj->zpi", inv_ovlp, phiw)
+    Ghalf = backend.matmul(phiw, inv_ovlp.transpose(0, 2, 1))
 
     return ovlp, Ghalf
 
@@ -286,17 +290,17 @@ def calc_walker_gf(walker, trial, ovlp):
         trial_walker overlap
     """
     inv_ovlp = backend.linalg.inv(ovlp[0])
-    walker.Ghalfa = backend.einsum("zij, zpj->zpi", inv_ovlp, walker.phiwa)
+    walker.Ghalfa = backend.matmul(walker.phiwa, inv_ovlp.transpose(0, 2, 1))
     # TODO: test the code without half_rotation
     if not trial.half_rotated:
         # print("Debug: trial is NOT half-rotated, construct the full Green funciton here!")
-        walker.Ga = backend.einsum("pi, nqi->npq", trial.psia.conj(), walker.Ghalfa)
+        walker.Ga = backend.matmul(trial.psia.conj(), walker.Ghalfa.transpose(0, 2, 1))
 
     if trial.ncomponents > 1:
         inv_ovlp = backend.linalg.inv(ovlp[1])
-        walker.Ghalfb = backend.einsum("zij, zpj->zpi", inv_ovlp, walker.phiwb)
+        walker.Ghalfb = backend.matmul(walker.phiwb, inv_ovlp.transpose(0, 2, 1))
         if not trial.half_rotated:
-            walker.Gb = backend.einsum("pi, nqi->npq", trial.psib.conj(), walker.Ghalfb)
+            walker.Gb = backend.matmul(trial.psib.conj(), walker.Ghalfb.transpose(0, 2, 1))
 
 
 def calc_trial_walker_ovlp(walker, trial):
@@ -350,7 +354,7 @@ def calc_trial_walker_ovlp_gf(walker, trial, return_signs=False):
     # TODO: test the code without half_rotation
     if not trial.half_rotated:
         # print("Debug: trial is NOT half-rotated, construct the full Green funciton here!")
-        walker.Ga = backend.einsum("pi, nqi->npq", trial.psia.conj(), walker.Ghalfa)
+        walker.Ga = backend.matmul(trial.psia.conj(), walker.Ghalfa.transpose(0, 2, 1))
 
     if trial.boson_psi is not None:
         # phi_{w, pi} Psi^T_{pj} --> zij, if i, j is only 1
@@ -377,7 +381,7 @@ def calc_trial_walker_ovlp_gf(walker, trial, return_signs=False):
         ovlp_b, walker.Ghalfb = trial_walker_ovlp_gf_base(walker.phiwb, trial.psib)
         sign_b, logovlp_b = backend.linalg.slogdet(ovlp_b)
         if not trial.half_rotated:
-            walker.Gb = backend.einsum("pi, nqi->npq", trial.psib.conj(), walker.Ghalfb)
+            walker.Gb = backend.matmul(trial.psib.conj(), walker.Ghalfb.transpose(0, 2, 1))
 
         ovlp = sign_a * sign_b * backend.exp(logovlp_a + logovlp_b - walker.logshift)
     else:
@@ -694,21 +698,24 @@ class TrialHF(TrialWFBase):
         Representation of boson: 1) Fock, 2) CS, 3), VLF, 4) real space.
         """
 
+        # the orbitals are built from the (host) pyscf objects and then moved to
+        # the QMC backend, so that all the contractions with walkers and the
+        # half-rotated integrals stay on the same device
         if self.OAO:
             overlap = self.mol.intor("int1e_ovlp")
             Xmat = lo.orth.lowdin(overlap)
-            xinv = backend.linalg.inv(Xmat)
+            xinv = numpy.linalg.inv(Xmat)
             # Nao * Na
             # self.psia = self.psib = xinv.dot(self.mf.mo_coeff[:, : self.mol.nelec[0]])
-            self.psia = xinv.dot(self.mf.mo_coeff[:, : self.mol.nelec[0]])
-            self.psib = xinv.dot(self.mf.mo_coeff[:, : self.mol.nelec[1]])
+            self.psia = to_device(xinv.dot(self.mf.mo_coeff[:, : self.mol.nelec[0]]))
+            self.psib = to_device(xinv.dot(self.mf.mo_coeff[:, : self.mol.nelec[1]]))
         else:
             nmo = self.mf.mo_coeff.shape[-1]
-            tmp = backend.identity(nmo)[:, self.mf.mo_occ > 0]
+            tmp = numpy.identity(nmo)[:, self.mf.mo_occ > 0]
             #self.psia = self.psib = tmp
             # psia and psib may have different size, when nalpha and nbeta are different
-            self.psia = tmp[:, self.nalpha]
-            self.psib = tmp[:, self.nbeta]
+            self.psia = to_device(tmp[:, self.nalpha])
+            self.psib = to_device(tmp[:, self.nbeta])
 
         # print("Debug: nelec  = ", self.mol.nelec)
         # print("Debug: mo_occ = ", self.mf.mo_occ)
@@ -940,21 +947,21 @@ class TrialUHF(TrialWFBase):
     def build(self):
         overlap = self.mol.intor("int1e_ovlp")  # AO Overlap Matrix, S
         Xmat = lo.orth.lowdin(overlap)  # Eigenvectors of S**(1/2) = X
-        xinv = backend.linalg.inv(Xmat)  # S**(-1/2)
+        xinv = numpy.linalg.inv(Xmat)  # S**(-1/2)
 
         # TODO: name change MO_ALPHA/beta -> psia/b
         MO_ALPHA = self.mf.mo_coeff[0, :, : self.mol.nelec[0]]  # Occupied ALPHA MO Coeffs
         MO_BETA = self.mf.mo_coeff[1, :, : self.mol.nelec[1]]  # Occupied BETA MO Coeffs
 
         self.psi = [
-            backend.dot(xinv, MO_ALPHA)
+            numpy.dot(xinv, MO_ALPHA)
         ]  # ALPHA ORBITALS AFTER LOWDIN ORTHOGONALIZATION
 
         self.psi.append(
-            backend.dot(xinv, MO_BETA)
+            numpy.dot(xinv, MO_BETA)
         )  # BETA ORBITALS AFTER LOWDIN ORTHOGONALIZATION
-        self.psi = backend.array(
-            self.psi
+        self.psi = to_device(
+            numpy.array(self.psi)
         )  # self.psi.shape = (spin, nocc mos per spin, nAOs)
 
         # green's function in SO
@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 import numpy
 from pyscf import gto, scf
 from openms.mqed import scqedhf as qedhf
@@ -32,5 +33,24 @@ class TestSCQEDHF(unittest.TestCase):
 
         self.assertAlmostEqual(qedmf.e_tot, ref, places=6, msg="Etot does not match the reference value.")
 
+    @unittest.skipIf(qedhf._qedhf is None, "compiled qedlibs module (_qedhf) is not available")
+    def test_fc_jk_do_cpp(self):
+        mol = gto.M(atom="H 0 0 0; F 0 0 0.92", basis="631g", verbose=0)
+
+        cavity_freq = numpy.asarray([0.5])
+        cavity_mode = numpy.asarray([[0.0, 5.e-2, 2.e-2]])
+        qedmf = qedhf.RHF(mol, xc=None, cavity_mode=cavity_mode, cavity_freq=cavity_freq, add_nuc_dipole=True)
+        qedmf.kernel()
+
+        rng = numpy.random.default_rng(1)
+        dm_do = rng.random((qedmf.nao, qedmf.nao))
+        dm_do += dm_do.T
+
+        # fused C++ kernel vs the blocked numpy contraction
+        vhf_cpp = qedmf.get_fc_jk_do(0, dm_do)
+        with mock.patch.object(qedhf, "_qedhf", None):
+            vhf_ref = qedmf.get_fc_jk_do(0, dm_do)
+        numpy.testing.assert_allclose(vhf_cpp, vhf_ref, rtol=0.0, atol=1.e-10)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,7 @@
+import os
+import sys
+import subprocess
+import importlib.util
 import numpy
 import unittest
 from pyscf import gto, scf, fci
@@ -12,6 +16,8 @@ def calc_qmc_energy(
     uhf=False,
     energy_scheme="hybrid",
     block_decompose_eri=False,
+    chol_thresh=1.0e-20,
+    **kwargs,
 ):
 
     r"""Note the number of walkers here is small, in order to do fast test"""
@@ -22,15 +28,23 @@ def calc_qmc_energy(
         num_walkers=num_walkers,
         energy_scheme=energy_scheme,
         uhf=uhf,
-        chol_thresh=1.0e-20,
+        chol_thresh=chol_thresh,
         property_calc_freq=1,
         verbose=mol.verbose,
+        **kwargs,
     )
 
     times, energies = afqmc.kernel()
     return energies
 
 
+def calc_seeded_qmc_energy(mol, seed=7, **kwargs):
+    r"""Short QMC run with a fixed random seed, for comparing options"""
+    numpy.random.seed(seed)
+    energies = calc_qmc_energy(mol, time=1.0, num_walkers=50, **kwargs)
+    return numpy.asarray(energies).real
+
+
 def get_mean_std(energies, ratio=10):
     # Compute the mean and standard deviation
     # Extract the real parts of the last m elements
@@ -113,5 +127,87 @@ class TestQMCH2(unittest.TestCase):
         )
 
 
+class TestQMCOptions(unittest.TestCase):
+    r"""Same-seed comparison of the numerical options against the default run"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mol = get_mol(4, 1.6 * 0.5291772, basis="sto6g", verbose=0, name="Hchain")
+        cls.ref = calc_seeded_qmc_energy(cls.mol)
+
+    def test_mixed_precision(self):
+        energies = calc_seeded_qmc_energy(self.mol, mixed_precision=True)
+        numpy.testing.assert_allclose(energies, self.ref, rtol=0.0, atol=1.0e-7)
+
+    def test_taylor_dtype(self):
+        energies = calc_seeded_qmc_energy(
+            self.mol, propagator_options={"taylor_dtype": numpy.complex64}
+        )
+        numpy.testing.assert_allclose(energies, self.ref, rtol=0.0, atol=1.0e-7)
+
+    def test_chol_method_cd(self):
+        # the CD and SVD vectors differ by a rotation, so the random fields (and
+        # trajectories) differ; compare the integrals and the mean energy instead
+        kwargs = dict(
+            dt=0.005, total_time=1.0, num_walkers=50, energy_scheme="hybrid",
+            property_calc_freq=1, verbose=0,
+        )
+        svd = AFQMC(self.mol, chol_thresh=1.0e-20, **kwargs)
+        numpy.random.seed(7)
+        cd = AFQMC(self.mol, chol_method="cd", chol_thresh=1.0e-10, **kwargs)
+        self.assertLessEqual(cd.ltensor.shape[0], svd.ltensor.shape[0])
+        eri_svd = numpy.einsum("npq, nrs->pqrs", svd.ltensor, svd.ltensor)
+        eri_cd = numpy.einsum("npq, nrs->pqrs", cd.ltensor, cd.ltensor)
+        numpy.testing.assert_allclose(eri_cd, eri_svd, rtol=0.0, atol=1.0e-9)
+
+        times, energies = cd.kernel()
+        energies = numpy.asarray(energies).real
+        self.assertAlmostEqual(energies.mean(), self.ref.mean(), delta=2.0e-2)
+
+    def test_ltensor_h5(self):
+        from openms.qmc import propagators
+
+        energies = calc_seeded_qmc_energy(self.mol, ltensor_backend="h5")
+        numpy.testing.assert_allclose(energies, self.ref, rtol=0.0, atol=1.0e-10)
+
+        # blocked HS operator streamed from an HDF5 dataset
+        from pyscf import lib
+
+        rng = numpy.random.default_rng(7)
+        ltensor = rng.random((9, 4, 4))
+        xshift = rng.random((5, 9)) + 1j * rng.random((5, 9))
+        ref = numpy.dot(xshift, ltensor.reshape(9, -1))
+        with lib.H5TmpFile() as f:
+            f["ltensor"] = ltensor
+            op = propagators.hs_operator(xshift, f["ltensor"], blksize=2)
+        numpy.testing.assert_allclose(op, ref, rtol=1.0e-12, atol=1.0e-12)
+
+    @unittest.skipIf(importlib.util.find_spec("cupy") is None, "cupy is not available")
+    def test_cupy_backend(self):
+        # the backend is chosen at import, so run in a fresh interpreter
+        script = (
+            "import numpy\n"
+            "from pyscf import gto\n"
+            "from openms.qmc import _backend\n"
+            "from openms.qmc.afqmc import AFQMC\n"
+            "assert _backend.backend.__name__ == 'cupy'\n"
+            "mol = gto.M(atom='H 0 0 0; H 0 0 0.74', basis='sto6g', verbose=0)\n"
+            "numpy.random.seed(7)\n"
+            "afqmc = AFQMC(mol, dt=0.005, total_time=1.0, num_walkers=50,\n"
+            "              energy_scheme='hybrid', chol_thresh=1.0e-20,\n"
+            "              property_calc_freq=1, verbose=0)\n"
+            "times, energies = afqmc.kernel()\n"
+            "print(numpy.mean([complex(e).real for e in energies[-50:]]))\n"
+        )
+        env = dict(os.environ, OPENMS_QMC_BACKEND="cupy")
+        out = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True
+        )
+        self.assertEqual(out.returncode, 0, out.stderr)
+        # H2/sto6g FCI energy; the cupy RNG differs from numpy's
+        energy = float(out.stdout.split()[-1])
+        self.assertAlmostEqual(energy, -1.1459, delta=1.0e-2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -93,6 +93,29 @@ def test_chols_oao():
     numpy.testing.assert_almost_equal(eri, eri_block, decimal=4, err_msg="ERI do not match the reference value.")
 
 
+def test_chols_cd_vs_svd():
+    r"""Reconstruct the ERI from the pivoted CD and the SVD factorizations"""
+
+    mol = get_mol(name="C3H4O2", basis="sto3g", verbose=1)
+    eri = mol.intor('int2e_sph', aosym='s1')
+
+    threshold = 1.e-6
+    ltensor_svd = tools.chols_full(mol, thresh=threshold, method="svd")
+    # residual-diagonal threshold of CD is looser than the singular-value one
+    ltensor_cd = tools.chols_full(mol, thresh=threshold * 1.e-2, method="cd")
+
+    eri_svd = numpy.einsum("xpq, xrs->pqrs", ltensor_svd, ltensor_svd)
+    eri_cd = numpy.einsum("xpq, xrs->pqrs", ltensor_cd, ltensor_cd)
+    err_svd = numpy.max(numpy.abs(eri_svd - eri))
+    err_cd = numpy.max(numpy.abs(eri_cd - eri))
+    print(f"nchol (svd/cd) = {ltensor_svd.shape[0]} {ltensor_cd.shape[0]}")
+    print(f"max ERI error (svd/cd) = {err_svd:.3e} {err_cd:.3e}")
+
+    assert err_svd < 1.e-5
+    assert err_cd < 1.e-5
+    numpy.testing.assert_allclose(eri_cd, eri_svd, atol=1.e-5)
+
+
 if NUMBA_AVAILABLE:
     @jit(nopython=True, fastmath=True)
     def pack_cholesky_jit(idx_i, idx_j, packed_chol, chol):
@@ -242,6 +265,11 @@ class TestQMC_Chols(unittest.TestCase):
         test_chols_oao()
 
 
+    def test_chols_cd_vs_svd(self):
+
+        test_chols_cd_vs_svd()
+
+
     def test_pack_triu(self):
 
         test_pack_triu()